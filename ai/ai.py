@@ -1,159 +1,504 @@
-from typing import List, Tuple, Optional
+from typing import List, Optional
 from math import inf
-from game.game_state import GameState
-from game.pathfinding import bfs_shortest_path_length
+import threading
+import time
+from game.game_state import Action, GameState
+from game.pathfinding import DistanceMaps, UNREACHABLE, all_shortest_path_edges
+from game.tables import board_tables
 from game.player import Player
 from game.board import Board
+from ai.transposition import TranspositionTable, EXACT, LOWER, UPPER
+from ai.stats import SearchStats
+from ai.ordering import MoveOrderer
+from ai.book import OpeningBook
+from ai.endgame import EndgameSolver
+
+# Scores are integers: ten points per step of path difference, one per wall in hand,
+# so a zero window (alpha, alpha + 1) separates any two different scores.
+WIN_SCORE = 1_000_000
+ASPIRATION_WINDOW = 15  # first aspiration half-width, about a step and a half
+# Root results are stored apart from interior entries of the same position,
+# so root move ordering does not depend on what earlier searches left behind.
+ROOT_KEY_SALT = 0x9E3779B97F4A7C15
+
+
+def generate_actions(state: GameState, player_index: int, distances: DistanceMaps) -> List[Action]:
+    """
+    Generate pawn moves + candidate wall placements.
+    Wall candidates are the walls that cut an edge on some shortest path
+    of either player: any other wall leaves both path lengths unchanged.
+    """
+    actions: List[Action] = []
+    #pawn
+    pawn_moves = state.legal_moves(player_index)
+    for (r, c) in pawn_moves:
+        actions.append(('M', r, c))
+
+    if state.players[player_index].walls <= 0:
+        return actions
+
+    # walls
+    board = state.board
+    n = board.size
+    last_wall = state.last_wall()
+    walls_on = board_tables(n).walls
+    candidates = set()
+    for i, pl in enumerate(state.players):
+        goal_row = n - 1 if i == 0 else 0
+        dist = distances.get(board, goal_row, last_wall)
+        for e in all_shortest_path_edges(board, (pl.r, pl.c), goal_row, dist) or ():
+            candidates.update(walls_on[e])
+
+    # validate them all at once (path checks included) so apply() can skip
+    # it; sorted so the order never depends on set iteration
+    for orient, wr, wc in state.legal_walls(sorted(candidates, key=lambda w: (w[1], w[2], w[0]))):
+        actions.append(('W', orient, wr, wc))
+
+    return actions
+
+
+class SearchAborted(Exception):
+    """Raised inside the search when the time budget runs out or a stop is requested."""
 
-Action = Tuple  # ('M', r, c) or ('W', 'H'|'V', wr, wc)
 
 class MinimaxAI:
-    def __init__(self, max_depth: int = 3):
+    def __init__(self, max_depth: int = 3, tt_size_log2: int = 18, time_limit_ms: Optional[int] = None,
+                 workers: int = 1, stats: bool = False, book: Optional[OpeningBook] = None,
+                 endgame: bool = True, endgame_proofs: bool = True):
+        """
+        max_depth: search depth, or the deepest iteration when time_limit_ms is set.
+        time_limit_ms: if given, choose_move deepens iteratively (1, 2, ...) and
+            returns the best move of the last iteration that finished in time.
+        workers: if > 1, root actions are searched in that many processes
+            (see ai.parallel); the chosen move is the same as with 1.
+        stats: collect SearchStats for every search (see enable_stats).
+        book: opening book; positions found in it are answered without a search.
+        endgame: solve positions with few walls left exactly (see ai.endgame)
+            instead of searching them.
+        endgame_proofs: with endgame, also try to prove wins while one side
+            still holds a few walls; off, only positions with no walls left
+            are solved.
+        """
         self.max_depth = max_depth
+        self.time_limit_ms = time_limit_ms
+        self.tt_size_log2 = tt_size_log2
+        self.workers = workers
+        self.book = book
+        self.endgame = EndgameSolver(proofs=endgame_proofs) if endgame else None
+        self._parallel = None  # process pool, started on first use
+        self.nodes = 0  # interior nodes visited, cumulative
+        # distance-to-goal grids per wall layout, shared by every leaf evaluation
+        self.distances = DistanceMaps()
+        # killer moves and history heuristic, plus the static path-based ranks
+        self.ordering = MoveOrderer(self.distances)
+        # kept across moves: positions reached again on later turns are still in it
+        self.tt = TranspositionTable(tt_size_log2)
+        self._deadline: Optional[float] = None
+        self._stop_event: Optional[threading.Event] = None
+        self.last_depth = 0  # depth of the last completed search
+        self.last_score = 0  # its score, for the side that was to move
+        self.last_pv: List[Action] = []  # its principal variation, starting with the move played
+        # (key, depth, move, score, pv) of the deepest finished ponder search
+        self._ponder: Optional[tuple] = None
+        self.ponder_hits = 0
+        self.stats: Optional[SearchStats] = None
+        if stats:
+            self.enable_stats()
 
-    def choose_move(self, state: GameState, player_index: int, depth: Optional[int] = None) -> Optional[Action]:
+    def enable_stats(self) -> SearchStats:
+        """
+        Start collecting SearchStats. The timed phases are wrapped here, so
+        an AI without stats runs the plain methods.
+        """
+        if self.stats is None:
+            self.stats = SearchStats()
+            self._generate_actions = self.stats.timed('generate', self._generate_actions)
+            self._evaluate = self.stats.timed('evaluate', self._evaluate)
+        return self.stats
+
+    def disable_stats(self) -> None:
+        if self.stats is not None:
+            del self._generate_actions
+            del self._evaluate
+            self.stats = None
+
+    def choose_move(self, state: GameState, player_index: int, depth: Optional[int] = None,
+                    stop_event: Optional[threading.Event] = None) -> Optional[Action]:
         """
         Top-level API. Returns an action tuple or None if nothing found.
+        Setting stop_event from another thread makes the search return early:
+        with a time limit it gives the last completed iteration's move,
+        otherwise None. The expected line of play is left in last_pv.
         """
         if depth is None:
             depth = self.max_depth
-        score, action = self._minimax_root(state, player_index, depth)
-        return action
+        self.last_pv = []
+        if self.book is not None:
+            move = self.book.lookup(state)
+            if move is not None:
+                self.last_pv = [move]
+                return move
+        if self.endgame is not None:
+            move = self.endgame.solve(state)
+            if move is not None:
+                self.last_pv = [move]
+                return move
+        ponder, self._ponder = self._ponder, None
+        if ponder is not None and ponder[0] == state.zobrist_key() and ponder[1] >= depth:
+            # the predicted reply was played and pondering already searched it deep enough
+            _, self.last_depth, move, self.last_score, self.last_pv = ponder
+            self.ponder_hits += 1
+            return move
+        stats = self.stats
+        if stats is not None:
+            stats.reset()
+            started = time.perf_counter()
+            root = stats.timed('clone', state.clone)()
+            root.apply = stats.timed('make_unmake', root.apply)
+            root.undo_last = stats.timed('make_unmake', root.undo_last)
+        else:
+            # one copy per search; every node below is played in place with apply/undo_last
+            root = state.clone()
+        # the game's moves so far are of no use to the search, and would
+        # only lengthen the scans in last_wall()
+        root._undo_stack.clear()
+        self.tt.new_search()
+        self.ordering.new_search()
+        self._stop_event = stop_event
+        try:
+            if self.time_limit_ms is None:
+                try:
+                    score, action, pv = self._negamax_root(root, player_index, depth)
+                except SearchAborted:
+                    return None
+                self.last_depth = depth
+                self.last_score = score
+                self.last_pv = pv
+                return action
+            return self._iterative_deepening(root, player_index, depth, self.time_limit_ms / 1000.0)
+        finally:
+            self._stop_event = None
+            if stats is not None:
+                stats.depth = self.last_depth
+                stats.elapsed = time.perf_counter() - started
+
+    def ponder(self, state: GameState, stop_event: threading.Event) -> None:
+        """
+        Think on the opponent's time. state is the position after our move;
+        the reply predicted by last_pv is played and the position after it
+        searched, depth by depth, until max_depth or stop_event. If that
+        reply comes, choose_move answers from the result at once (a ponder
+        hit); after any other reply the transposition table is still warm.
+        """
+        self._ponder = None
+        if len(self.last_pv) < 2 or state.winner is not None:
+            return
+        position = state.clone()
+        position._undo_stack.clear()
+        if not position.apply(self.last_pv[1]) or position.winner is not None:
+            return
+        player_index = position.current
+        key = position.zobrist_key()
+        self.tt.new_search()
+        self.ordering.new_search()
+        self._stop_event = stop_event
+        score = None
+        best_action = None
+        try:
+            for d in range(1, self.max_depth + 1):
+                if self.time_limit_ms is None:
+                    score, action, pv = self._negamax_root(position, player_index, d)
+                else:
+                    score, action, pv = self._aspiration(position, player_index, d, score, best_action)
+                if action is None:
+                    break
+                best_action = action
+                self._ponder = (key, d, action, score, pv)
+                if abs(score) >= WIN_SCORE:
+                    break
+        except SearchAborted:
+            pass
+        finally:
+            self._stop_event = None
+
+    def _iterative_deepening(self, state: GameState, player_index: int, max_depth: int, budget: float) -> Optional[Action]:
+        start = time.perf_counter()
+        best_action = None
+        score = None
+        try:
+            for d in range(1, max_depth + 1):
+                # depth 1 always completes so there is a move to fall back on
+                self._deadline = start + budget if d > 1 else None
+                score, action, pv = self._aspiration(state, player_index, d, score, best_action)
+                if action is not None:
+                    best_action = action
+                    self.last_pv = pv
+                self.last_depth = d
+                self.last_score = score
+                if abs(score) >= WIN_SCORE:
+                    break  # forced result, deeper search cannot change it
+                if time.perf_counter() - start >= budget:
+                    break
+        except SearchAborted:
+            pass
+        finally:
+            self._deadline = None
+        return best_action
+
+    def _aspiration(self, state: GameState, player_index: int, depth: int, guess: Optional[float],
+                    first: Optional[Action]):
+        """
+        Root search in a window around the previous iteration's score,
+        widened and repeated on the failing side until the score lands
+        inside it. The parallel root always searches the full window.
+        """
+        if guess is None or abs(guess) >= WIN_SCORE or self.workers > 1:
+            return self._negamax_root(state, player_index, depth, first)
+        delta = ASPIRATION_WINDOW
+        alpha, beta = guess - delta, guess + delta
+        while True:
+            score, action, pv = self._negamax_root(state, player_index, depth, first, alpha, beta)
+            if alpha < score < beta:
+                return score, action, pv
+            delta *= 4
+            wide = delta > 16 * ASPIRATION_WINDOW  # third failure: open that side fully
+            if score <= alpha:
+                alpha = -inf if wide else score - delta
+            else:
+                beta = inf if wide else score + delta
+                first = action  # the move that failed high is the one to confirm
+
+    def parallel_stats(self) -> dict:
+        """Timing of the last parallel root search, including per-worker busy time and speedup."""
+        return self._parallel.last_stats if self._parallel is not None else {}
+
+    def close(self) -> None:
+        """Shut down the worker processes, if any were started."""
+        if self._parallel is not None:
+            self._parallel.close()
+            self._parallel = None
 
-    def _minimax_root(self, state: GameState, player_index: int, depth: int):
+    def tt_stats(self) -> dict:
+        """Transposition table hit/miss counters (cumulative over the AI's lifetime)."""
+        return self.tt.stats()
+
+    def _negamax_root(self, state: GameState, player_index: int, depth: int, first: Optional[Action] = None,
+                      alpha: float = -inf, beta: float = inf):
+        """
+        (score, best action, principal variation) for player_index to move.
+        The best action is the first one in root order with the best score;
+        inside a window narrower than (-inf, inf) a score <= alpha or
+        >= beta is only a bound.
+        """
+        alpha0 = alpha
         best_score = -inf
         best_action = None
-        alpha = -inf
-        beta = inf
+        pv: List[Action] = []
+
+        key = state.zobrist_key() ^ ROOT_KEY_SALT
+        entry = self.tt.probe(key)
+        tt_move = entry[4] if entry is not None else None
+        if entry is not None and entry[1] == depth and entry[3] == EXACT and tt_move is not None:
+            return entry[2], tt_move, self._complete_pv(state, [tt_move], depth)
 
         actions = self._generate_actions(state, player_index)
-        # Basic ordering: prioritize pawn moves first (often stronger and fewer)
-        actions.sort(key=lambda a: 0 if a[0] == 'M' else 1)
+        # static order only (no killers/history), so the root order, and with
+        # it the choice between equally scored moves, depends on the position
+        # alone; the previous iteration's best move goes first, then the table's move
+        actions = self.ordering.order_root(state, player_index, actions)
+        for m in (tt_move, first):
+            if m is not None and m in actions:
+                actions.remove(m)
+                actions.insert(0, m)
 
+        if self.workers > 1 and len(actions) > 1:
+            from ai.parallel import ParallelRoot, MAX_ROOT_ACTIONS
+            if len(actions) <= MAX_ROOT_ACTIONS:
+                if self._parallel is None:
+                    self._parallel = ParallelRoot(self.workers, {
+                        'max_depth': self.max_depth,
+                        'tt_size_log2': self.tt_size_log2,
+                    })
+                best_score, best_action, pv = self._parallel.search_root(
+                    state, player_index, depth, actions, self._deadline, self._stop_event,
+                    search_id=self.tt.generation)
+                if best_action is not None:
+                    self.tt.store(key, depth, best_score, EXACT, best_action)
+                return best_score, best_action, self._complete_pv(state, pv, depth)
+
+        searched = 0
         for a in actions:
-            child = state.clone()
-            success = self._apply_action(child, player_index, a)
-            if not success:
+            if not state.apply(a, checked=True):
                 continue
-            score = self._minimax(child, depth - 1, alpha, beta, maximizing=False, ai_index=player_index)
+            child_pv: List[Action] = []
+            if searched == 0:
+                score = -self._negamax(state, depth - 1, -beta, -alpha, 1, child_pv)
+            else:
+                # principal variation search: prove the move is no better
+                # than alpha with a zero window, re-search only if it is
+                score = -self._negamax(state, depth - 1, -alpha - 1, -alpha, 1, child_pv)
+                if alpha < score < beta:
+                    child_pv = []
+                    score = -self._negamax(state, depth - 1, -beta, -alpha, 1, child_pv)
+            state.undo_last()
+            searched += 1
             if score > best_score:
                 best_score = score
                 best_action = a
-            alpha = max(alpha, best_score)
-            if beta <= alpha:
+            if score > alpha:
+                alpha = score
+                pv = [a] + child_pv
+            if alpha >= beta:
                 break
-        return best_score, best_action
+        if self.stats is not None:
+            self.stats.node(0)
+            self.stats.expansion(searched, -1)
+        if best_action is not None:
+            if best_score <= alpha0:
+                flag = UPPER
+            elif best_score >= beta:
+                flag = LOWER
+            else:
+                flag = EXACT
+            self.tt.store(key, depth, best_score, flag, best_action)
+        if not pv and best_action is not None:
+            pv = [best_action]
+        return best_score, best_action, self._complete_pv(state, pv, depth)
+
+    def _complete_pv(self, state: GameState, pv: List[Action], depth: int) -> List[Action]:
+        """
+        Extend pv to depth moves by following transposition-table moves,
+        since lines cut short by a table hit come back incomplete.
+        """
+        pv = list(pv)
+        played = 0
+        for a in pv:
+            if not state.apply(a):
+                del pv[played:]
+                break
+            played += 1
+        while len(pv) < depth and state.winner is None:
+            entry = self.tt.probe(state.zobrist_key())
+            if entry is None or entry[4] is None or not state.apply(entry[4]):
+                break
+            pv.append(entry[4])
+            played += 1
+        for _ in range(played):
+            state.undo_last()
+        return pv
+
+    def _negamax(self, state: GameState, depth: int, alpha: float, beta: float, ply: int,
+                 pv: List[Action]) -> float:
+        """
+        Score of the position for the side to move (fail-soft alpha-beta
+        with principal variation search). pv is filled with the best line
+        when the score falls inside the window.
+        """
+        if self._deadline is not None and time.perf_counter() >= self._deadline:
+            raise SearchAborted()
+        if self._stop_event is not None and self._stop_event.is_set():
+            raise SearchAborted()
+        self.nodes += 1
+        stats = self.stats
+        if stats is not None:
+            stats.node(ply)
 
-    def _minimax(self, state: GameState, depth: int, alpha: float, beta: float, maximizing: bool, ai_index: int) -> float:
+        current = state.current
         winner = state.get_winner()
         if winner is not None:
-            if winner == ai_index:
-                return 1e6
-            else:
-                return -1e6
+            return WIN_SCORE if winner == current else -WIN_SCORE
 
         if depth == 0:
-            return self._evaluate(state, ai_index)
+            return self._evaluate(state, current)
+
+        key = state.zobrist_key()
+        alpha0 = alpha
+        tt_move = None
+        entry = self.tt.probe(key)
+        if entry is not None:
+            tt_move = entry[4]
+            # Only same-depth entries may cut off, so the value of every node
+            # stays exactly what a plain alpha-beta search at this depth gives.
+            if entry[1] == depth:
+                tt_value, flag = entry[2], entry[3]
+                if flag == EXACT:
+                    if tt_move is not None:
+                        pv[:] = [tt_move]
+                    return tt_value
+                if flag == LOWER:
+                    alpha = max(alpha, tt_value)
+                else:
+                    beta = min(beta, tt_value)
+                if alpha >= beta:
+                    return tt_value
 
-        current = state.current
         actions = self._generate_actions(state, current)
+        actions = self.ordering.order(state, current, actions, ply, tt_move)
 
-        if maximizing:
-            value = -inf
-            for a in actions:
-                child = state.clone()
-                if not self._apply_action(child, current, a):
-                    continue
-                value = max(value, self._minimax(child, depth - 1, alpha, beta, False, ai_index))
-                alpha = max(alpha, value)
-                if alpha >= beta:
-                    break
-            return value
-        else:
-            value = inf
-            for a in actions:
-                child = state.clone()
-                if not self._apply_action(child, current, a):
-                    continue
-                value = min(value, self._minimax(child, depth - 1, alpha, beta, True, ai_index))
-                beta = min(beta, value)
-                if alpha >= beta:
-                    break
-            return value
+        value = -inf
+        best_move = None
+        searched = 0
+        cutoff_at = -1
+        for a in actions:
+            if not state.apply(a, checked=True):
+                continue
+            child_pv: List[Action] = []
+            if searched == 0:
+                score = -self._negamax(state, depth - 1, -beta, -alpha, ply + 1, child_pv)
+            else:
+                score = -self._negamax(state, depth - 1, -alpha - 1, -alpha, ply + 1, child_pv)
+                if alpha < score < beta:
+                    child_pv = []
+                    score = -self._negamax(state, depth - 1, -beta, -alpha, ply + 1, child_pv)
+            state.undo_last()
+            searched += 1
+            if score > value:
+                value = score
+                best_move = a
+            if score > alpha:
+                alpha = score
+                pv[:] = [a] + child_pv
+            if alpha >= beta:
+                cutoff_at = searched - 1
+                self.ordering.cutoff(a, current, ply, depth)
+                break
+        if stats is not None:
+            stats.expansion(searched, cutoff_at)
 
-    def _apply_action(self, state: GameState, player_index: int, action: Action) -> bool:
-        """
-        Apply an action to the provided (cloned) GameState.
-        Returns True if action succeeded and modified the state, False otherwise.
-        """
-        if action[0] == 'M':
-            # ('M', r, c)
-            _, r, c = action
-            return state.move_pawn(player_index, r, c)
+        if value <= alpha0:
+            flag = UPPER
+        elif value >= beta:
+            flag = LOWER
         else:
-            # ('W', orient, wr, wc)
-            _, orient, wr, wc = action
-            return state.try_place_wall(player_index, orient, wr, wc)
+            flag = EXACT
+        self.tt.store(key, depth, value, flag, best_move)
+        return value
 
     def _generate_actions(self, state: GameState, player_index: int) -> List[Action]:
-        """
-        Generate pawn moves + candidate wall placements.
-        Wall candidates are filtered to be near either pawn (manhattan <= 3) to reduce branching.
-        """
-        actions: List[Action] = []
-        #pawn
-        pawn_moves = state.legal_moves(player_index)
-        for (r, c) in pawn_moves:
-            actions.append(('M', r, c))
-
-        # walls
-        size = state.board.size
-        s = size - 1
-        p = state.players[player_index]
-        opp = state.players[1 - player_index]
+        return generate_actions(state, player_index, self.distances)
 
-        # helper to test proximity
-        def near_player(wr, wc):
-            d1 = abs(wr - p.r) + abs(wc - p.c)
-            d2 = abs(wr - opp.r) + abs(wc - opp.c)
-            return (d1 <= 3) or (d2 <= 3)
-
-        if p.walls <= 0:
-            return actions
-
-        # iterate possible intersections but filter by proximity and basic can_place
-        for wr in range(s):
-            for wc in range(s):
-                if not near_player(wr, wc):
-                    continue
-                # Horizontal
-                if state.can_place_wall('H', wr, wc):
-                    # We don't run try_place here (path check) — try_place will be executed in simulation.
-                    actions.append(('W', 'H', wr, wc))
-                # Vertical
-                if state.can_place_wall('V', wr, wc):
-                    actions.append(('W', 'V', wr, wc))
-
-        return actions
-
-#Score (AI perspective) = (opd - myd) + 0.1*(my_walls - opp_walls)
-    def _evaluate(self, state: GameState, ai_index: int) -> float:
+#Score (player's perspective) = 10*(opd - myd) + (my_walls - opp_walls)
+    def _evaluate(self, state: GameState, player_index: int) -> int:
         """
-        Evaluate board from AI's perspective. Positive = good for AI.
+        Evaluate board from player_index's perspective. Positive = good for them.
         Uses shortest path lengths and remaining walls.
         """
-        my = state.players[ai_index]
-        opp = state.players[1 - ai_index]
-        myd = bfs_shortest_path_length(state.board, (my.r, my.c), [state.board.size - 1] if ai_index == 0 else [0])
-        opd = bfs_shortest_path_length(state.board, (opp.r, opp.c), [state.board.size - 1] if (1 - ai_index) == 0 else [0])
+        my = state.players[player_index]
+        opp = state.players[1 - player_index]
+        board = state.board
+        n = board.size
+        last_wall = state.last_wall()
+        maps = (self.distances.get(board, n - 1, last_wall), self.distances.get(board, 0, last_wall))
+        myd = maps[player_index][my.r * n + my.c]
+        opd = maps[1 - player_index][opp.r * n + opp.c]
 
         INF_DIST = 1000
-        if myd is None:
+        if myd == UNREACHABLE:
             myd = INF_DIST
-        if opd is None:
+        if opd == UNREACHABLE:
             opd = INF_DIST
 
-        score = float(opd - myd)
-        score += 0.1 * (my.walls - opp.walls)
+        score = 10 * (opd - myd)
+        score += my.walls - opp.walls
 
         return score
@@ -0,0 +1,212 @@
+"""
+Opening book: best moves for known early positions, keyed by
+GameState.zobrist_key().
+
+File layout (little-endian):
+    header  magic b'QBOOK', version u8, board size u8, pad u8, entry count u32
+    entries sorted by key, each: key u64, move u16, depth u8, pad u8, weight u32
+The file is memory-mapped and searched in place, so opening a book costs
+nothing however large it is.
+
+Building, from the project root:
+    python -m ai.book search --size 9 --plies 8 --depth 4 --width 3
+    python -m ai.book selfplay selfplay.jsonl --size 9 --plies 10 --out book.bin
+"search" runs a fixed-depth MinimaxAI on every position up to --plies,
+following the chosen move plus --width - 1 other pawn moves from each.
+"selfplay" replays ai.selfplay records and keeps, per position, the move
+that most often led to a win for the side that played it.
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, Optional, Tuple
+
+from game.game_state import Action, GameState
+from game.bitboard import BitBoard
+from utils import resource_path
+
+MAGIC = b'QBOOK'
+VERSION = 1
+HEADER = struct.Struct('<5sBBxI')
+ENTRY = struct.Struct('<QHBxI')
+BOOK_DIR = resource_path(os.path.join('ai', 'books'))  # shipped books, bundled like the ui assets
+
+_WALL = 0x8000
+_VERTICAL = 0x4000
+
+
+def encode_move(action: Action) -> int:
+    if action[0] == 'M':
+        return action[1] << 5 | action[2]
+    _, orient, wr, wc = action
+    return _WALL | (_VERTICAL if orient == 'V' else 0) | wr << 5 | wc
+
+
+def decode_move(code: int) -> Action:
+    r, c = code >> 5 & 0x1F, code & 0x1F
+    if not code & _WALL:
+        return ('M', r, c)
+    return ('W', 'V' if code & _VERTICAL else 'H', r, c)
+
+
+class OpeningBook:
+    """Read-only view of a book file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.size, self.count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mm.close()
+            raise ValueError(f'{path} is not a version {VERSION} opening book')
+        self.hits = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def probe(self, key: int) -> Optional[Tuple[Action, int, int]]:
+        """(move, depth, weight) stored for key, or None."""
+        mm = self._mm
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            k, code, depth, weight = ENTRY.unpack_from(mm, HEADER.size + mid * ENTRY.size)
+            if k < key:
+                lo = mid + 1
+            elif k > key:
+                hi = mid
+            else:
+                return decode_move(code), depth, weight
+        return None
+
+    def lookup(self, state: GameState) -> Optional[Action]:
+        """Book move for the side to move, if the position is known and the move is legal."""
+        if state.board.size != self.size or state.winner is not None:
+            return None
+        entry = self.probe(state.zobrist_key())
+        if entry is None:
+            return None
+        move = entry[0]
+        if move[0] == 'M':
+            legal = state.is_legal_pawn_move(move[1], move[2])
+        else:
+            legal = bool(state.legal_walls([move[1:]]))
+        if not legal:
+            return None  # a key collision, or a book built for other rules
+        self.hits += 1
+        return move
+
+
+def write_book(path: str, size: int, entries: Dict[int, Tuple[Action, int, int]]) -> None:
+    """Write {key: (move, depth, weight)} as a book file."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, size, len(entries)))
+        for key in sorted(entries):
+            move, depth, weight = entries[key]
+            f.write(ENTRY.pack(key, encode_move(move), min(depth, 255), min(weight, 0xFFFFFFFF)))
+
+
+_DEFAULT_BOOKS: Dict[int, Optional[OpeningBook]] = {}
+
+
+def default_book(size: int) -> Optional[OpeningBook]:
+    """The book shipped in ai/books for this board size, or None if there is none."""
+    if size not in _DEFAULT_BOOKS:
+        path = os.path.join(BOOK_DIR, f'book_{size}.bin')
+        _DEFAULT_BOOKS[size] = OpeningBook(path) if os.path.exists(path) else None
+    return _DEFAULT_BOOKS[size]
+
+
+def build_from_search(size: int, plies: int, depth: int, width: int = 2,
+                      log=print) -> Dict[int, Tuple[Action, int, int]]:
+    """Book entries from fixed-depth searches of every position up to plies deep."""
+    from ai.ai import MinimaxAI
+    ai = MinimaxAI(max_depth=depth)
+    entries: Dict[int, Tuple[Action, int, int]] = {}
+    frontier = [GameState(size, board_cls=BitBoard)]
+    for ply in range(plies):
+        children = []
+        for state in frontier:
+            key = state.zobrist_key()
+            if key in entries or state.winner is not None:
+                continue
+            move = ai.choose_move(state, state.current)
+            if move is None:
+                continue
+            entries[key] = (move, depth, 1)
+            # the book move, then other pawn moves the opponent may answer with
+            follow = [move] + [('M', r, c) for r, c in state.legal_moves(state.current)
+                               if ('M', r, c) != move]
+            for action in follow[:width]:
+                child = state.clone()
+                if child.apply(action):
+                    child._undo_stack.clear()
+                    children.append(child)
+        log(f'ply {ply + 1}: {len(entries)} positions')
+        frontier = children
+    return entries
+
+
+def build_from_selfplay(records: Iterable[dict], size: int, plies: int) -> Dict[int, Tuple[Action, int, int]]:
+    """Book entries from ai.selfplay records: the move that won most often per position."""
+    wins: Dict[int, Counter] = defaultdict(Counter)
+    for record in records:
+        if record.get('size') != size or record.get('winner') is None:
+            continue
+        state = GameState(size, board_cls=BitBoard)
+        for action in record['moves'][:plies]:
+            action = tuple(action)
+            mover = state.current
+            key = state.zobrist_key()
+            if not state.apply(action):
+                break
+            if mover == record['winner']:
+                wins[key][action] += 1
+    entries = {}
+    for key, counts in wins.items():
+        move, n = counts.most_common(1)[0]
+        entries[key] = (move, 0, n)
+    return entries
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Build a Quoridor opening book.')
+    sub = parser.add_subparsers(dest='source', required=True)
+    p = sub.add_parser('search', help='fixed-depth searches from the start position')
+    p.add_argument('--depth', type=int, default=3)
+    p.add_argument('--width', type=int, default=2, help='moves followed from each position')
+    p = sub.add_parser('selfplay', help='winning moves from ai.selfplay JSONL files')
+    p.add_argument('games', nargs='+')
+    for p in sub.choices.values():
+        p.add_argument('--size', type=int, default=9)
+        p.add_argument('--plies', type=int, default=8)
+        p.add_argument('--out', default=None, help='default: ai/books/book_<size>.bin')
+    args = parser.parse_args(argv)
+
+    if args.source == 'search':
+        entries = build_from_search(args.size, args.plies, args.depth, args.width)
+    else:
+        def records():
+            for path in args.games:
+                with open(path) as f:
+                    for line in f:
+                        if line.strip():
+                            yield json.loads(line)
+        entries = build_from_selfplay(records(), args.size, args.plies)
+    out = args.out or os.path.join(BOOK_DIR, f'book_{args.size}.bin')
+    write_book(out, args.size, entries)
+    print(f'{len(entries)} positions written to {out}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
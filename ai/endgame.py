@@ -0,0 +1,317 @@
+"""
+Exact endgame solving for MinimaxAI.
+
+With no walls left in either hand the wall layout is final and the game is
+a pure race over the two pawn positions: at most 2 * cells * cells states.
+A RaceTable solves all of them at once by retrograde analysis, so every
+later move of the game is a lookup.
+
+With a few walls left on one side only and that side to move,
+EndgameSolver runs a bounded proof search for a forced win: the holder's
+walls are tried in order of how much they lengthen the opponent's path
+against the holder's own, positions with no walls in hand are settled by
+the race table of their layout, and the search gives up (returns None)
+once its budget is spent rather than guess.
+"""
+from array import array
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from game.board import Board
+from game.game_state import Action, GameState
+from game.pathfinding import bfs_shortest_path_length
+from game.tables import board_tables
+
+# outcomes, from the side to move's point of view
+WIN = 1
+DRAW = 0   # neither side can force a win (the pawns can shuffle forever)
+LOSS = -1
+
+FEW_WALLS = 2          # proof search when one side has none and the other at most this many
+PROOF_MAX_PLIES = 12
+# Work allowed per proof search, in nodes. Listing and ordering the legal
+# walls counts as WALL_LIST_COST nodes and building a race table as one node
+# per four cells; a 9x9 table (~20 ms) is 20 nodes. With the walls ordered a
+# winning one is nearly always among the first few, and a larger budget
+# mostly buys more time on positions that stay unproven.
+PROOF_BUDGET = 40
+WALL_LIST_COST = 4
+# Race tables kept per solver, counted in positions (2 * cells^2 per table,
+# three bytes each): about 6 MB, i.e. ~150 tables on 9x9 or ~35 on 13x13.
+RACE_TABLE_STATES = 2_000_000
+
+
+class _BudgetSpent(Exception):
+    pass
+
+
+def open_neighbours(board: Board) -> List[List[int]]:
+    """For each flat cell r*size + c, the cells one step away with no wall between."""
+    blocked = board.edge_blocked
+    return [[j for j, e in steps if not blocked(e)] for steps in board_tables(board.size).steps]
+
+
+def pawn_moves(nbrs: List[List[int]], me: int, opp: int) -> List[int]:
+    """rules.legal_moves on flat cells: steps, the straight jump, or side jumps when it is blocked."""
+    moves = []
+    for j in nbrs[me]:
+        if j != opp:
+            moves.append(j)
+            continue
+        straight = 2 * j - me
+        if straight in nbrs[j]:
+            moves.append(straight)
+        else:
+            for k in nbrs[j]:
+                if k != me and k not in moves:
+                    moves.append(k)
+    return moves
+
+
+class RaceTable:
+    """
+    Outcome of every no-walls position on one wall layout.
+
+    result(a, b, side), with a and b the flat cells of players 0 and 1 and
+    side the player to move, gives (WIN/DRAW/LOSS, plies to the end with
+    best play: fastest win, slowest loss).
+    """
+
+    def __init__(self, board: Board):
+        n = board.size
+        cells = n * n
+        self.size = n
+        self.cells = cells
+        self.nbrs = nbrs = open_neighbours(board)
+        total = 2 * cells * cells
+        outcome = [DRAW] * total
+        plies = [0] * total
+        solved = [False] * total
+        remaining = [0] * total
+        preds: List[List[int]] = [[] for _ in range(total)]
+        queue = deque()
+
+        for side in (0, 1):
+            for a in range(cells):
+                for b in range(cells):
+                    if a == b:
+                        continue
+                    s = (side * cells + a) * cells + b
+                    if a >= cells - n or b < n:
+                        # someone already reached their goal row: the side to move lost
+                        outcome[s] = LOSS
+                        solved[s] = True
+                        queue.append(s)
+                        continue
+                    if side == 0:
+                        succ = [(cells + a2) * cells + b for a2 in pawn_moves(nbrs, a, b)]
+                    else:
+                        succ = [a * cells + b2 for b2 in pawn_moves(nbrs, b, a)]
+                    remaining[s] = len(succ)
+                    for t in succ:
+                        preds[t].append(s)
+
+        # retrograde, in order of plies: a position is won as soon as one move
+        # reaches a lost one, and lost once every move reaches a won one
+        while queue:
+            t = queue.popleft()
+            for s in preds[t]:
+                if solved[s]:
+                    continue
+                if outcome[t] == LOSS:
+                    outcome[s] = WIN
+                    plies[s] = plies[t] + 1
+                    solved[s] = True
+                    queue.append(s)
+                else:
+                    remaining[s] -= 1
+                    if remaining[s] == 0:
+                        outcome[s] = LOSS
+                        plies[s] = plies[t] + 1
+                        solved[s] = True
+                        queue.append(s)
+        self.states = total
+        # compact copies: the lists above cost 8 bytes a slot, these 1 and 2
+        self._outcome = array('b', outcome)
+        self._plies = array('H', plies)
+
+    def result(self, a: int, b: int, side: int) -> Tuple[int, int]:
+        s = (side * self.cells + a) * self.cells + b
+        return self._outcome[s], self._plies[s]
+
+    def state_result(self, state: GameState) -> Tuple[int, int]:
+        n = self.size
+        p0, p1 = state.players
+        return self.result(p0.r * n + p0.c, p1.r * n + p1.c, state.current)
+
+    def best_move(self, state: GameState) -> Optional[Action]:
+        """Fastest win, else a draw, else the slowest loss, for the side to move."""
+        n = self.size
+        side = state.current
+        p0, p1 = state.players
+        a, b = p0.r * n + p0.c, p1.r * n + p1.c
+        me, opp = (a, b) if side == 0 else (b, a)
+        best = None
+        best_key = None
+        for m in pawn_moves(self.nbrs, me, opp):
+            outcome, plies = self.result(m, opp, 1) if side == 0 else self.result(opp, m, 0)
+            # the reply's outcome is the opponent's: their loss is our win
+            key = (-outcome, plies if outcome == WIN else -plies)
+            if best_key is None or key > best_key:
+                best, best_key = m, key
+        return None if best is None else ('M', best // n, best % n)
+
+
+class EndgameSolver:
+    """Race tables per wall layout, and the few-walls proof search built on them."""
+
+    def __init__(self, max_states: int = RACE_TABLE_STATES, proofs: bool = True):
+        """proofs: also run the few-walls proof search, not just the no-walls tables."""
+        self.max_states = max_states
+        self.proofs = proofs
+        # keyed by (size, wall_hash): the empty board hashes to 0 at every size
+        self._tables: Dict[Tuple[int, int], RaceTable] = {}
+        self._states = 0  # positions held by the cached tables
+        self._proofs: Dict[int, bool] = {}
+        self._unproven: set = set()  # position keys whose proof ran out of budget
+        self._budget = 0
+
+    def table(self, board: Board) -> RaceTable:
+        key = (board.size, board.wall_hash)
+        table = self._tables.get(key)
+        if table is None:
+            table = RaceTable(board)
+            if self._states + table.states > self.max_states:
+                self._tables.clear()
+                self._states = 0
+            self._tables[key] = table
+            self._states += table.states
+        return table
+
+    def _proof_table(self, board: Board) -> RaceTable:
+        if (board.size, board.wall_hash) not in self._tables:
+            self._charge(board.size * board.size // 4)
+        return self.table(board)
+
+    def _charge(self, cost: int) -> None:
+        self._budget -= cost
+        if self._budget < 0:
+            raise _BudgetSpent()
+
+    def applies(self, state: GameState) -> bool:
+        w0, w1 = state.players[0].walls, state.players[1].walls
+        if not self.proofs:
+            return state.winner is None and w0 == w1 == 0
+        return state.winner is None and min(w0, w1) == 0 and max(w0, w1) <= FEW_WALLS
+
+    def solve(self, state: GameState) -> Optional[Action]:
+        """
+        A move that is proven best for the side to move, or None when the
+        position is not an endgame or the proof did not finish in budget.
+        """
+        if not self.applies(state):
+            return None
+        if state.players[0].walls == state.players[1].walls == 0:
+            return self.table(state.board).best_move(state)
+
+        holder = 0 if state.players[0].walls else 1
+        if state.current != holder:
+            # a move proven not to lose needs every wall of the holder
+            # refuted, a race table each, which never fits the budget
+            return None
+        table = self.table(state.board)
+        if table.state_result(state)[0] == WIN:
+            # the race is won without walls: play it out as fast as possible
+            return table.best_move(state)
+        key = state.zobrist_key()
+        if key in self._unproven:
+            return None
+        state = state.clone()
+        self._budget = PROOF_BUDGET
+        try:
+            for max_plies in range(2, PROOF_MAX_PLIES + 1, 2):
+                unknown = False
+                for action in self._moves(state, holder):
+                    state.apply(action, checked=True)
+                    try:
+                        won = self._prove(state, holder, max_plies - 1)
+                    finally:
+                        state.undo_last()
+                    if won is None:
+                        unknown = True
+                    elif won:
+                        return action
+                if not unknown:
+                    return None  # proven lost: let the search pick the toughest defence
+        except _BudgetSpent:
+            if len(self._unproven) > 1 << 12:
+                self._unproven.clear()
+            self._unproven.add(key)
+        return None
+
+    def _prove(self, state: GameState, holder: int, plies_left: int) -> Optional[bool]:
+        """True if holder wins by force, False if it cannot, None if undecided within plies_left."""
+        if state.winner is not None:
+            return state.winner == holder
+        self._charge(1)
+        key = state.zobrist_key()
+        known = self._proofs.get(key)
+        if known is not None:
+            return known
+
+        outcome, _ = self._proof_table(state.board).state_result(state)
+        holder_to_move = state.current == holder
+        if state.players[holder].walls == 0:
+            won = outcome == (WIN if holder_to_move else LOSS)
+        elif outcome == (WIN if holder_to_move else LOSS):
+            won = True  # wins the race without walls; the other side has none to stop it
+        elif plies_left == 0:
+            return None
+        else:
+            won = not holder_to_move
+            unknown = False
+            for action in self._moves(state, holder):
+                state.apply(action, checked=True)
+                try:
+                    child = self._prove(state, holder, plies_left - 1)
+                finally:
+                    state.undo_last()
+                if child is None:
+                    unknown = True
+                elif child == holder_to_move:
+                    won = child
+                    unknown = False
+                    break
+            if unknown:
+                return None
+        if len(self._proofs) > 1 << 18:
+            self._proofs.clear()
+        self._proofs[key] = won
+        return won
+
+    def _moves(self, state: GameState, holder: int) -> List[Action]:
+        # pawn moves first: they reuse the current race table
+        actions = [('M', r, c) for r, c in state.legal_moves(state.current)]
+        if state.current == holder:
+            self._charge(WALL_LIST_COST)
+            actions += self._ordered_walls(state, holder)
+        return actions
+
+    @staticmethod
+    def _ordered_walls(state: GameState, holder: int) -> List[Action]:
+        """The holder's legal walls, the most opponent path gained over its own first."""
+        board = state.board
+        n = board.size
+        me, opp = state.players[holder], state.players[1 - holder]
+        my_goal, opp_goal = ([n - 1], [0]) if holder == 0 else ([0], [n - 1])
+        scored = []
+        for orient, wr, wc in state.legal_walls():
+            place, remove = ((board.place_horizontal, board.remove_horizontal) if orient == 'H'
+                             else (board.place_vertical, board.remove_vertical))
+            place(wr, wc)
+            gain = (bfs_shortest_path_length(board, (opp.r, opp.c), opp_goal)
+                    - bfs_shortest_path_length(board, (me.r, me.c), my_goal))
+            remove(wr, wc)
+            scored.append((-gain, len(scored), ('W', orient, wr, wc)))
+        scored.sort()
+        return [action for _, _, action in scored]
@@ -0,0 +1,311 @@
+import math
+import random
+import threading
+import time
+from typing import List, Optional
+
+from game.game_state import Action, GameState
+from game.pathfinding import DistanceMaps, UNREACHABLE, shortest_path_edges
+from game.tables import board_tables
+from ai.ai import generate_actions
+from ai.ordering import MoveOrderer
+
+EXPLORATION = 1.4
+ROLLOUT_PLIES_PER_ROW = 1   # rollouts stop after this many plies per board row
+ROLLOUT_WALL_PROB = 0.1     # chance a rollout move is a wall across the opponent's path
+ROLLOUT_RANDOM_PROB = 0.1   # chance a rollout pawn move ignores the shortest path
+PONDER_MAX_PLAYOUTS = 200_000  # bounds the tree grown while the opponent thinks
+
+
+class _Node:
+    __slots__ = ('move', 'parent', 'player', 'key', 'children', 'untried', 'visits', 'wins')
+
+    def __init__(self, move: Optional[Action], parent: Optional['_Node'], player: int, key: int):
+        self.move = move
+        self.parent = parent
+        self.player = player      # who played move; wins are counted for them
+        self.key = key            # zobrist key of the position after move
+        self.children: List['_Node'] = []
+        self.untried: Optional[List[Action]] = None  # filled on first expansion
+        self.visits = 0
+        self.wins = 0.0
+
+
+class MCTSAI:
+    """
+    Monte Carlo tree search (UCT) with the same choose_move interface as
+    MinimaxAI.
+
+    Children are expanded in the move orderer's static order, so pawn
+    moves along the shortest path and walls across the opponent's path
+    get visited first. Rollouts mostly walk each pawn down its shortest
+    path, now and then dropping a wall in the opponent's way, and after
+    a few plies per board row the race is decided by path lengths. The
+    subtree of the position actually reached is kept for the next turn.
+    """
+
+    def __init__(self, iterations: Optional[int] = 2000, time_limit_ms: Optional[int] = None,
+                 exploration: float = EXPLORATION, seed: Optional[int] = None, workers: int = 1):
+        """
+        iterations: playouts per move (None for no limit; then time_limit_ms must be set).
+        time_limit_ms: stop after this long even if iterations are left.
+        workers: if > 1, that many processes each grow their own tree from
+            the root under the same budget and their root visit counts are
+            summed (see ai.parallel.ParallelMCTS).
+        """
+        if iterations is None and time_limit_ms is None:
+            raise ValueError('MCTSAI needs an iteration or a time budget')
+        self.iterations = iterations
+        self.time_limit_ms = time_limit_ms
+        self.exploration = exploration
+        self.seed = seed
+        self.workers = workers
+        self._parallel = None  # worker processes, started on first use
+        self.rng = random.Random(seed)
+        self.distances = DistanceMaps()
+        self.ordering = MoveOrderer(self.distances)
+        self.nodes = 0  # playouts, cumulative
+        self.last_iterations = 0
+        self.last_score = 0.0  # win rate of the chosen move
+        self.last_pv: List[Action] = []  # most visited line
+        self.reused_visits = 0  # visits inherited from the previous turn's tree
+        self._root: Optional[_Node] = None
+
+    def choose_move(self, state: GameState, player_index: int, depth: Optional[int] = None,
+                    stop_event: Optional[threading.Event] = None) -> Optional[Action]:
+        """
+        Top-level API. Returns an action tuple or None if nothing found.
+        depth is accepted for compatibility with MinimaxAI and ignored.
+        """
+        if state.winner is not None:
+            return None
+        deadline = None
+        if self.time_limit_ms is not None:
+            deadline = time.perf_counter() + self.time_limit_ms / 1000.0
+
+        if self.workers > 1:
+            from ai.parallel import ParallelMCTS
+            if self._parallel is None:
+                self._parallel = ParallelMCTS(self.workers, {
+                    'iterations': self.iterations,
+                    'time_limit_ms': self.time_limit_ms,
+                    'exploration': self.exploration,
+                    'seed': self.seed,
+                })
+            move, self.last_score, self.last_pv = self._parallel.search(state, deadline, stop_event)
+            stats = self._parallel.last_stats
+            self.last_iterations = stats['iterations']
+            self.reused_visits = stats['reused_visits']
+            self.nodes += self.last_iterations
+            return move
+
+        root = self.search(state, deadline, stop_event)
+        if not root.children:
+            return None
+        best = max(root.children, key=lambda ch: ch.visits)
+        self.last_score = best.wins / best.visits if best.visits else 0.0
+        self.last_pv = self._principal_line(root)
+        return best.move
+
+    def search(self, state: GameState, deadline: Optional[float] = None,
+               stop_event: Optional[threading.Event] = None) -> _Node:
+        """
+        Run playouts from state until the iteration budget, the perf_counter
+        deadline or stop_event, and return the root of the (reused) tree.
+        """
+        root = self._reuse_root(state)
+        self.reused_visits = root.visits
+        search = state.clone()
+        search._undo_stack.clear()
+
+        done = 0
+        while self.iterations is None or done < self.iterations:
+            if stop_event is not None and stop_event.is_set():
+                break
+            if deadline is not None and done % 16 == 0 and time.perf_counter() >= deadline:
+                break
+            self._iterate(root, search)
+            done += 1
+        self.nodes += done
+        self.last_iterations = done
+        self._root = root
+        return root
+
+    def ponder(self, state: GameState, stop_event: threading.Event) -> None:
+        """
+        Think on the opponent's time: grow the tree of state (the position
+        after our move, opponent to move) until stop_event is set. Whatever
+        reply comes, choose_move picks up its subtree. Single-process only.
+        """
+        if self.workers > 1 or state.winner is not None:
+            return
+        root = self._reuse_root(state)
+        search = state.clone()
+        search._undo_stack.clear()
+        done = 0
+        while done < PONDER_MAX_PLAYOUTS and not stop_event.is_set():
+            self._iterate(root, search)
+            done += 1
+        self.nodes += done
+        self._root = root
+
+    def summary(self) -> List[str]:
+        """Short human-readable lines about the last search, e.g. for the debug overlay."""
+        workers = f" in {self.workers} processes" if self.workers > 1 else ""
+        return [
+            f"MCTS {self.last_iterations:,} playouts{workers} (+{self.reused_visits:,} reused)",
+            f"best move win rate {self.last_score:.0%}",
+        ]
+
+    def parallel_stats(self) -> dict:
+        """Timing and playouts per worker of the last parallel search."""
+        return self._parallel.last_stats if self._parallel is not None else {}
+
+    def close(self) -> None:
+        """Shut down the worker processes, if any were started."""
+        if self._parallel is not None:
+            self._parallel.close()
+            self._parallel = None
+
+    def _reuse_root(self, state: GameState) -> _Node:
+        """The node for state from last turn's tree (two plies down at most), or a fresh root."""
+        key = state.zobrist_key()
+        old = self._root
+        if old is not None:
+            frontier = [old]
+            for _ in range(3):
+                for node in frontier:
+                    if node.key == key:
+                        node.parent = None
+                        node.move = None
+                        return node
+                frontier = [ch for node in frontier for ch in node.children]
+        return _Node(None, None, 1 - state.current, key)
+
+    def _iterate(self, root: _Node, state: GameState) -> None:
+        node = root
+        played = 0
+        # selection: descend through fully expanded nodes by UCT
+        while node.untried is not None and not node.untried and node.children and state.winner is None:
+            node = self._select(node)
+            state.apply(node.move, checked=True)
+            played += 1
+        # expansion: add one untried move
+        if state.winner is None:
+            if node.untried is None:
+                actions = generate_actions(state, state.current, self.distances)
+                actions = self.ordering.order_root(state, state.current, actions)
+                actions.reverse()  # popped from the end, best first
+                node.untried = actions
+            if node.untried:
+                mover = state.current
+                action = node.untried.pop()
+                state.apply(action, checked=True)
+                played += 1
+                child = _Node(action, node, mover, state.zobrist_key())
+                node.children.append(child)
+                node = child
+        winner = self._rollout(state)
+        for _ in range(played):
+            state.undo_last()
+        # backpropagation
+        while node is not None:
+            node.visits += 1
+            if winner == node.player:
+                node.wins += 1.0
+            elif winner is None:
+                node.wins += 0.5
+            node = node.parent
+
+    def _select(self, node: _Node) -> _Node:
+        log_n = math.log(node.visits)
+        c = self.exploration
+        best = None
+        best_value = -1.0
+        for ch in node.children:
+            value = ch.wins / ch.visits + c * math.sqrt(log_n / ch.visits)
+            if value > best_value:
+                best, best_value = ch, value
+        return best
+
+    def _rollout(self, state: GameState) -> Optional[int]:
+        """Play fast biased moves from state, undo them, and return the (likely) winner."""
+        played = 0
+        limit = ROLLOUT_PLIES_PER_ROW * state.board.size
+        while state.winner is None and played < limit:
+            if not self._rollout_wall(state) and not self._rollout_step(state):
+                break
+            played += 1
+        winner = state.winner
+        if winner is None:
+            winner = self._race_winner(state)
+        for _ in range(played):
+            state.undo_last()
+        return winner
+
+    def _rollout_wall(self, state: GameState) -> bool:
+        """Maybe play a random wall across the opponent's shortest path; True if one was played."""
+        rnd = self.rng
+        pi = state.current
+        if state.players[pi].walls <= 0 or rnd.random() >= ROLLOUT_WALL_PROB:
+            return False
+        board = state.board
+        n = board.size
+        opp = state.players[1 - pi]
+        goal = n - 1 if pi == 1 else 0
+        path = shortest_path_edges(board, (opp.r, opp.c), goal, self.distances.get(board, goal, state.last_wall()))
+        if not path:
+            return False
+        wall = rnd.choice(board_tables(n).walls[rnd.choice(sorted(path))])
+        if not state.can_place_wall(*wall):
+            return False
+        # play it, then let the (cached) distance maps say whether both pawns still get through
+        state.apply(('W',) + wall, checked=True)
+        p0, p1 = state.players
+        if (self.distances.get(board, n - 1, wall)[p0.r * n + p0.c] == UNREACHABLE
+                or self.distances.get(board, 0, wall)[p1.r * n + p1.c] == UNREACHABLE):
+            state.undo_last()
+            return False
+        return True
+
+    def _rollout_step(self, state: GameState) -> bool:
+        """Play a pawn move, usually one along the shortest path; False if there is none."""
+        rnd = self.rng
+        pi = state.current
+        moves = state.legal_moves(pi)
+        if not moves:
+            return False
+        if rnd.random() < ROLLOUT_RANDOM_PROB:
+            r, c = rnd.choice(moves)
+        else:
+            board = state.board
+            n = board.size
+            dist = self.distances.get(board, n - 1 if pi == 0 else 0, state.last_wall())
+            best_d = min((dist[r * n + c] for r, c in moves if dist[r * n + c] != UNREACHABLE),
+                         default=UNREACHABLE)
+            r, c = rnd.choice([m for m in moves if dist[m[0] * n + m[1]] == best_d])
+        state.apply(('M', r, c), checked=True)
+        return True
+
+    def _race_winner(self, state: GameState) -> Optional[int]:
+        """Who wins if both pawns just run from here: the side to move wins ties."""
+        board = state.board
+        n = board.size
+        last_wall = state.last_wall()
+        p0, p1 = state.players
+        d0 = self.distances.get(board, n - 1, last_wall)[p0.r * n + p0.c]
+        d1 = self.distances.get(board, 0, last_wall)[p1.r * n + p1.c]
+        if d0 == UNREACHABLE or d1 == UNREACHABLE:
+            return None
+        mover = state.current
+        mine, theirs = (d0, d1) if mover == 0 else (d1, d0)
+        return mover if mine <= theirs else 1 - mover
+
+    @staticmethod
+    def _principal_line(root: _Node, max_len: int = 8) -> List[Action]:
+        line = []
+        node = root
+        while node.children and len(line) < max_len:
+            node = max(node.children, key=lambda ch: ch.visits)
+            line.append(node.move)
+        return line
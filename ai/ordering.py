@@ -0,0 +1,114 @@
+from typing import Dict, List, Optional
+
+from game.game_state import Action, GameState
+from game.pathfinding import DistanceMaps, UNREACHABLE, shortest_path_edges
+from game.tables import board_tables
+
+# ordering tiers, searched highest first
+TIER_TT = 6
+TIER_KILLER_1 = 5
+TIER_KILLER_2 = 4
+TIER_PAWN_FORWARD = 3    # pawn move that shortens the mover's path
+TIER_WALL_BLOCKING = 2   # wall across the opponent's shortest path, clear of the mover's
+TIER_QUIET = 1           # other pawn moves, and walls that block both players
+TIER_WALL_OTHER = 0
+
+MAX_PLY = 64
+
+
+class MoveOrderer:
+    """
+    Move ordering for MinimaxAI.
+
+    Interior nodes are ordered: transposition-table move, the two killer
+    moves of the ply, then a static tier (see TIER_*), with the history
+    heuristic breaking ties inside a tier. The root uses the static tiers
+    only, so its order is a function of the position alone and does not
+    depend on what earlier searches (or other processes) have seen.
+    """
+
+    def __init__(self, distances: DistanceMaps):
+        self.distances = distances
+        self.killers: List[List[Optional[Action]]] = [[None, None] for _ in range(MAX_PLY)]
+        # per player, since pawn moves are stored by destination cell
+        self.history: List[Dict[Action, int]] = [{}, {}]
+
+    def new_search(self) -> None:
+        """Forget killers and age the history so recent searches dominate it."""
+        for k in self.killers:
+            k[0] = k[1] = None
+        for table in self.history:
+            for a in list(table):
+                v = table[a] >> 1
+                if v:
+                    table[a] = v
+                else:
+                    del table[a]
+
+    def cutoff(self, action: Action, player_index: int, ply: int, depth: int) -> None:
+        """Record a move that caused a beta cutoff at ply with depth plies left."""
+        if ply < MAX_PLY:
+            k = self.killers[ply]
+            if k[0] != action:
+                k[1] = k[0]
+                k[0] = action
+        table = self.history[player_index]
+        table[action] = table.get(action, 0) + depth * depth
+
+    def static_tiers(self, state: GameState, player_index: int, actions: List[Action]) -> List[int]:
+        """TIER_* of each action, from the distance maps of both players."""
+        board = state.board
+        n = board.size
+        me = state.players[player_index]
+        opp = state.players[1 - player_index]
+        my_goal = n - 1 if player_index == 0 else 0
+        opp_goal = n - 1 - my_goal
+        last_wall = state.last_wall()
+        my_map = self.distances.get(board, my_goal, last_wall)
+        here = my_map[me.r * n + me.c]
+
+        cut_edges = board_tables(n).edges
+        tiers = []
+        path_edges = None
+        for a in actions:
+            if a[0] == 'M':
+                d = my_map[a[1] * n + a[2]]
+                tiers.append(TIER_PAWN_FORWARD if d != UNREACHABLE and d < here else TIER_QUIET)
+                continue
+            if path_edges is None:
+                opp_map = self.distances.get(board, opp_goal, last_wall)
+                path_edges = (
+                    shortest_path_edges(board, (opp.r, opp.c), opp_goal, opp_map) or set(),
+                    shortest_path_edges(board, (me.r, me.c), my_goal, my_map) or set(),
+                )
+            cut = cut_edges[a[1:]]
+            opp_edges, my_edges = path_edges
+            if cut[0] in opp_edges or cut[1] in opp_edges:
+                blocks_me = cut[0] in my_edges or cut[1] in my_edges
+                tiers.append(TIER_QUIET if blocks_me else TIER_WALL_BLOCKING)
+            else:
+                tiers.append(TIER_WALL_OTHER)
+        return tiers
+
+    def order_root(self, state: GameState, player_index: int, actions: List[Action]) -> List[Action]:
+        tiers = self.static_tiers(state, player_index, actions)
+        # stable sort: equal tiers keep generation order
+        order = sorted(range(len(actions)), key=lambda i: -tiers[i])
+        return [actions[i] for i in order]
+
+    def order(self, state: GameState, player_index: int, actions: List[Action], ply: int,
+              tt_move: Optional[Action] = None) -> List[Action]:
+        tiers = self.static_tiers(state, player_index, actions)
+        k1, k2 = self.killers[ply] if ply < MAX_PLY else (None, None)
+        history = self.history[player_index]
+        keys = []
+        for a, tier in zip(actions, tiers):
+            if a == tt_move:
+                tier = TIER_TT
+            elif a == k1:
+                tier = TIER_KILLER_1
+            elif a == k2:
+                tier = TIER_KILLER_2
+            keys.append((-tier, -history.get(a, 0)))
+        order = sorted(range(len(actions)), key=keys.__getitem__)
+        return [actions[i] for i in order]
@@ -0,0 +1,308 @@
+"""
+Parallel search: root splitting for MinimaxAI, root parallelism for MCTSAI.
+
+Every root action is searched as its own task in a ProcessPoolExecutor.
+Workers keep one MinimaxAI (and so one transposition table) per process
+for the lifetime of the pool. Positions travel as GameState.to_bytes()
+and are searched on a BitBoard in the workers, whatever the caller uses.
+
+Alpha sharing: finished root scores are published in a shared array.
+The task for root action i starts with alpha = the best score published
+by actions before i in root order. That alpha is never above the one the
+sequential loop would use at i, so every score that can win is exact, and
+picking the first maximum in root order gives the same move as the
+single-process search at the same depth.
+
+MCTSAI runs one long-lived process per worker, each growing its own tree
+from the root under the shared budget, and sums the root visit counts.
+A worker keeps its tree between turns like the single-process engine
+does, which is why each tree lives in a fixed process rather than in a
+pool that may hand the next search to any of them.
+"""
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from multiprocessing.connection import wait as wait_connections
+from math import inf
+from typing import List, Optional, Tuple
+
+from game.game_state import GameState
+from game.bitboard import BitBoard
+
+# largest number of root actions: every wall slot in both orientations plus pawn moves
+MAX_ROOT_ACTIONS = 2 * 12 * 12 + 8
+
+_worker_ai = None
+_worker_scores = None
+_worker_abort = None
+_worker_search = None  # search id the worker's tables were last prepared for
+
+
+class _SharedFlag:
+    """threading.Event look-alike over a shared byte, so MinimaxAI's stop check works in a worker."""
+
+    def __init__(self, value):
+        self.value = value
+
+    def is_set(self) -> bool:
+        return bool(self.value.value)
+
+
+def _init_worker(scores, abort, ai_kwargs):
+    global _worker_ai, _worker_scores, _worker_abort
+    from ai.ai import MinimaxAI
+    _worker_ai = MinimaxAI(**ai_kwargs)
+    _worker_scores = scores
+    _worker_abort = abort
+
+
+def _search_root_action(position: bytes, player_index: int, depth: int, index: int,
+                        action: tuple, deadline: Optional[float], search_id: int = 0):
+    """
+    Worker task: score one root action.
+    Returns (index, score or None, aborted, cpu seconds, nodes, pid, pv).
+    The first task of a new search_id ages the worker's tables the way
+    MinimaxAI.choose_move does at the start of every search.
+    """
+    global _worker_search
+    from ai.ai import SearchAborted
+    ai = _worker_ai
+    if search_id != _worker_search:
+        ai.tt.new_search()
+        ai.ordering.new_search()
+        _worker_search = search_id
+    start = time.perf_counter()
+    cpu = time.process_time()
+    nodes = ai.nodes
+    state = GameState.from_bytes(position, board_cls=BitBoard)
+    if not state.apply(action):
+        return index, None, False, time.process_time() - cpu, 0, os.getpid(), []
+
+    alpha = -inf
+    for j in range(index):
+        v = _worker_scores[j]
+        if not math.isnan(v) and v > alpha:
+            alpha = v
+
+    # deadline arrives as wall-clock time, since perf_counter is per process
+    ai._deadline = None if deadline is None else start + (deadline - time.time())
+    ai._stop_event = _SharedFlag(_worker_abort)
+    pv = []
+    try:
+        score = -ai._negamax(state, depth - 1, -inf, -alpha, 1, pv)
+    except SearchAborted:
+        return index, None, True, time.process_time() - cpu, ai.nodes - nodes, os.getpid(), []
+    finally:
+        ai._deadline = None
+        ai._stop_event = None
+    _worker_scores[index] = score
+    return index, score, False, time.process_time() - cpu, ai.nodes - nodes, os.getpid(), [action] + pv
+
+
+class ParallelRoot:
+    """Process pool and shared state used by MinimaxAI when workers > 1."""
+
+    def __init__(self, workers: int, ai_kwargs: dict):
+        self.workers = workers
+        self._scores = multiprocessing.Array('d', MAX_ROOT_ACTIONS, lock=False)
+        self._abort = multiprocessing.Value('b', 0, lock=False)
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self._scores, self._abort, ai_kwargs),
+        )
+        self.last_stats: dict = {}
+
+    def search_root(self, state: GameState, player_index: int, depth: int, actions: List[tuple],
+                    deadline: Optional[float], stop_event=None,
+                    search_id: int = 0) -> Tuple[float, Optional[tuple], List[tuple]]:
+        """
+        Score all root actions in the pool and pick the first best one in
+        root order; returns (score, action, principal variation).
+        search_id names the caller's search (MinimaxAI passes its table
+        generation); workers start fresh tables whenever it changes.
+        Raises SearchAborted if the deadline or stop_event fires.
+        """
+        from ai.ai import SearchAborted
+        for i in range(len(actions)):
+            self._scores[i] = math.nan
+        self._abort.value = 0
+        position = state.to_bytes()
+        wall_deadline = None if deadline is None else time.time() + (deadline - time.perf_counter())
+
+        start = time.perf_counter()
+        pending = {
+            self._pool.submit(_search_root_action, position, player_index, depth, i, a, wall_deadline,
+                              search_id)
+            for i, a in enumerate(actions)
+        }
+        results = []
+        aborted = False
+        while pending:
+            done, pending = wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+            for f in done:
+                res = f.result()
+                results.append(res)
+                aborted = aborted or res[2]
+            if aborted or (stop_event is not None and stop_event.is_set()):
+                self._abort.value = 1
+                for f in pending:
+                    f.cancel()
+                wait(pending)
+                raise SearchAborted()
+        wall = time.perf_counter() - start
+
+        per_worker: dict = {}
+        for _, _, _, busy, nodes, pid, _ in results:
+            w = per_worker.setdefault(pid, {'tasks': 0, 'busy_s': 0.0, 'nodes': 0})
+            w['tasks'] += 1
+            w['busy_s'] += busy
+            w['nodes'] += nodes
+        total_busy = sum(w['busy_s'] for w in per_worker.values())
+        for w in per_worker.values():
+            # share of the search this worker took off a single process
+            w['speedup_share'] = w['busy_s'] / wall if wall > 0 else 0.0
+        self.last_stats = {
+            'depth': depth,
+            'root_actions': len(actions),
+            'wall_s': wall,
+            'busy_s': total_busy,
+            'speedup': total_busy / wall if wall > 0 else 0.0,
+            'workers': per_worker,
+        }
+
+        best_score = -inf
+        best_action = None
+        best_pv = []
+        for index, score, _, _, _, _, pv in sorted(results, key=lambda res: res[0]):
+            if score is not None and score > best_score:
+                best_score = score
+                best_action = actions[index]
+                best_pv = pv
+        return best_score, best_action, best_pv
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _mcts_worker(conn, abort, ai_kwargs):
+    """
+    Worker process loop for ParallelMCTS: receives (GameState.to_bytes(), wall-clock
+    deadline or None), grows this process's tree, sends back the root's
+    children as (move, visits, wins) plus bookkeeping. None ends the loop.
+    """
+    from ai.mcts import MCTSAI
+    ai = MCTSAI(**ai_kwargs)
+    stop = _SharedFlag(abort)
+    while True:
+        try:
+            msg = conn.recv()
+        except EOFError:
+            break
+        if msg is None:
+            break
+        position, deadline = msg
+        cpu = time.process_time()
+        # deadline arrives as wall-clock time, since perf_counter is per process
+        local_deadline = None if deadline is None else time.perf_counter() + (deadline - time.time())
+        root = ai.search(GameState.from_bytes(position, board_cls=BitBoard), local_deadline, stop)
+        children = [(ch.move, ch.visits, ch.wins) for ch in root.children]
+        conn.send((children, ai._principal_line(root), ai.last_iterations, ai.reused_visits,
+                   time.process_time() - cpu, os.getpid()))
+    conn.close()
+
+
+class ParallelMCTS:
+    """Long-lived worker processes used by MCTSAI when workers > 1."""
+
+    def __init__(self, workers: int, ai_kwargs: dict):
+        self.workers = workers
+        self._abort = multiprocessing.Value('b', 0, lock=False)
+        self._conns = []
+        self._procs = []
+        seed = ai_kwargs.get('seed')
+        for i in range(workers):
+            # independent trees need independent playouts
+            kwargs = dict(ai_kwargs, seed=None if seed is None else seed + i)
+            parent, child = multiprocessing.Pipe()
+            proc = multiprocessing.Process(target=_mcts_worker, args=(child, self._abort, kwargs),
+                                           daemon=True)
+            proc.start()
+            child.close()
+            self._conns.append(parent)
+            self._procs.append(proc)
+        self.last_stats: dict = {}
+
+    def search(self, state: GameState, deadline: Optional[float],
+               stop_event=None) -> Tuple[Optional[tuple], float, List[tuple]]:
+        """
+        Search state in every worker until deadline (perf_counter) or
+        stop_event, then merge: the move with the most visits over all
+        trees. Returns (move or None, its win rate, principal variation).
+        """
+        self._abort.value = 0
+        position = state.to_bytes()
+        wall_deadline = None if deadline is None else time.time() + (deadline - time.perf_counter())
+        start = time.perf_counter()
+        for conn in self._conns:
+            conn.send((position, wall_deadline))
+
+        results = {}
+        pending = list(self._conns)
+        while pending:
+            for conn in wait_connections(pending, timeout=0.05):
+                results[self._conns.index(conn)] = conn.recv()
+                pending.remove(conn)
+            if stop_event is not None and stop_event.is_set():
+                self._abort.value = 1  # workers return what they have; keep collecting
+        wall = time.perf_counter() - start
+
+        visits: dict = {}
+        wins: dict = {}
+        per_worker: dict = {}
+        for i in sorted(results):
+            children, pv, iterations, reused, busy, pid = results[i]
+            for move, n, w in children:
+                visits[move] = visits.get(move, 0) + n
+                wins[move] = wins.get(move, 0.0) + w
+            per_worker[pid] = {'iterations': iterations, 'reused_visits': reused, 'busy_s': busy}
+        total_busy = sum(w['busy_s'] for w in per_worker.values())
+        self.last_stats = {
+            'iterations': sum(w['iterations'] for w in per_worker.values()),
+            'reused_visits': sum(w['reused_visits'] for w in per_worker.values()),
+            'wall_s': wall,
+            'busy_s': total_busy,
+            'speedup': total_busy / wall if wall > 0 else 0.0,
+            'workers': per_worker,
+        }
+        if not visits:
+            return None, 0.0, []
+
+        # first maximum in worker order, so ties go the same way every time
+        best = max(visits, key=visits.get)
+        # line from the tree that trusted the move most
+        best_pv = []
+        best_n = -1
+        for i in sorted(results):
+            children, pv = results[i][:2]
+            n = next((n for move, n, _ in children if move == best), 0)
+            if pv and pv[0] == best and n > best_n:
+                best_pv, best_n = pv, n
+        return best, wins[best] / visits[best], best_pv or [best]
+
+    def close(self) -> None:
+        for conn in self._conns:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for proc in self._procs:
+            proc.join(timeout=1.0)
+            if proc.is_alive():
+                proc.terminate()
+        for conn in self._conns:
+            conn.close()
+        self._conns = []
+        self._procs = []
@@ -0,0 +1,153 @@
+"""
+Headless AI-vs-AI self-play.
+
+    python -m ai.selfplay --games 200 --depths 2 3 --sizes 9 11 --workers 4 --out games.jsonl
+
+Games are spread over a process pool and each finished game is written
+to the JSONL file as soon as it comes back, one JSON object per line:
+    game, seed, size, depths, winner (0, 1 or null for the ply cap),
+    plies, moves, ms_per_move, nodes (per player), seconds
+The seed drives a few random opening plies so repeated pairings differ.
+With --archive the games are also appended to a game.record archive
+(and its index), the format all finished games are kept in.
+"""
+import argparse
+import itertools
+import json
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional
+
+from game.game_state import GameState
+from game.bitboard import BitBoard
+from game.record import GameIndex, GameRecord, RecordWriter
+from ai.ai import MinimaxAI
+
+DEFAULT_MAX_PLIES = 300
+
+
+def play_game(game_id: int, seed: int, size: int, depths: List[int], time_ms: Optional[int] = None,
+              random_plies: int = 2, max_plies: int = DEFAULT_MAX_PLIES) -> dict:
+    """Play one game between two MinimaxAIs and return its record."""
+    rnd = random.Random(seed)
+    state = GameState(size, board_cls=BitBoard)
+    ais = [MinimaxAI(max_depth=d, time_limit_ms=time_ms) for d in depths]
+    moves = []
+    move_ms = []
+    start = time.perf_counter()
+
+    # random opening pawn moves, so one pairing yields many different games
+    for _ in range(random_plies):
+        action = ('M',) + rnd.choice(state.legal_moves(state.current))
+        state.apply(action, checked=True)
+        moves.append(action)
+
+    while state.winner is None and len(moves) < max_plies:
+        ai = ais[state.current]
+        t = time.perf_counter()
+        action = ai.choose_move(state, state.current)
+        move_ms.append(1000.0 * (time.perf_counter() - t))
+        if action is None or not state.apply(action):
+            break  # no legal move found; record the game as unfinished
+        moves.append(action)
+
+    return {
+        'game': game_id,
+        'seed': seed,
+        'size': size,
+        'depths': depths,
+        'time_ms': time_ms,
+        'winner': state.winner,
+        'plies': len(moves),
+        'moves': moves,
+        'ms_per_move': sum(move_ms) / len(move_ms) if move_ms else 0.0,
+        'max_ms_per_move': max(move_ms) if move_ms else 0.0,
+        'nodes': [ai.nodes for ai in ais],
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def to_game_record(record: dict) -> GameRecord:
+    """A play_game() result as a game.record GameRecord."""
+    time_ms = record.get('time_ms')
+    names = [f"MinimaxAI depth {d}" + (f" {time_ms} ms" if time_ms else "") for d in record['depths']]
+    return GameRecord(record['size'], [tuple(a) for a in record['moves']], record['winner'], {
+        'Event': 'selfplay',
+        'Player1': names[0],
+        'Player2': names[1],
+        'Seed': str(record['seed']),
+    })
+
+
+def _play_game_task(kwargs: dict) -> dict:
+    return play_game(**kwargs)
+
+
+def game_configs(games: int, seed: int, sizes: List[int], depths: List[int], time_ms: Optional[int],
+                 random_plies: int, max_plies: int, swap_sides: bool):
+    """One kwargs dict per game, cycling through the sizes and optionally alternating sides."""
+    sizes_cycle = itertools.cycle(sizes)
+    for i in range(games):
+        d = list(depths)
+        if swap_sides and i % 2:
+            d.reverse()
+        yield {
+            'game_id': i,
+            'seed': seed + i,
+            'size': next(sizes_cycle),
+            'depths': d,
+            'time_ms': time_ms,
+            'random_plies': random_plies,
+            'max_plies': max_plies,
+        }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Play MinimaxAI against itself without the GUI.')
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--depths', type=int, nargs=2, default=[2, 2], metavar=('P1', 'P2'),
+                        help='search depth of each player (max depth when --time-ms is set)')
+    parser.add_argument('--time-ms', type=int, default=None, help='per-move time budget (iterative deepening)')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[9])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--random-plies', type=int, default=2)
+    parser.add_argument('--max-plies', type=int, default=DEFAULT_MAX_PLIES)
+    parser.add_argument('--swap-sides', action='store_true', help='alternate which depth plays first')
+    parser.add_argument('--workers', type=int, default=None, help='processes (default: CPU count)')
+    parser.add_argument('--out', default='selfplay.jsonl')
+    parser.add_argument('--archive', default=None, help='also append the games to this game.record archive')
+    args = parser.parse_args(argv)
+
+    configs = list(game_configs(args.games, args.seed, args.sizes, args.depths, args.time_ms,
+                                args.random_plies, args.max_plies, args.swap_sides))
+    wins = [0, 0]
+    unfinished = 0
+    start = time.perf_counter()
+    archive = RecordWriter(args.archive, GameIndex(args.archive)) if args.archive else None
+    with open(args.out, 'a') as out, ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(_play_game_task, cfg) for cfg in configs]
+        for done, fut in enumerate(as_completed(futures), 1):
+            record = fut.result()
+            out.write(json.dumps(record) + '\n')
+            out.flush()
+            if archive is not None:
+                archive.write(to_game_record(record))
+            if record['winner'] is None:
+                unfinished += 1
+            else:
+                wins[record['winner']] += 1
+            print(f"[{done}/{len(configs)}] game {record['game']}: size {record['size']}, "
+                  f"winner {record['winner']}, {record['plies']} plies, "
+                  f"{record['ms_per_move']:.0f} ms/move", flush=True)
+    if archive is not None:
+        archive.close()
+    elapsed = time.perf_counter() - start
+    print(f'player 1 wins: {wins[0]}, player 2 wins: {wins[1]}, unfinished: {unfinished}; '
+          f'{len(configs) / elapsed * 3600:.0f} games/hour')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
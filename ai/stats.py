@@ -0,0 +1,95 @@
+import json
+import time
+from typing import Callable, Dict, List
+
+PHASES = ('clone', 'generate', 'evaluate', 'make_unmake')
+
+
+class SearchStats:
+    """
+    Counters for one MinimaxAI search (reset at the start of every choose_move).
+
+    MinimaxAI only touches this object when stats are enabled; phase timing
+    is done by wrapping the timed methods, so a disabled collector costs
+    nothing beyond a None check per node.
+    """
+
+    def __init__(self):
+        # created once: timed() wrappers keep references to these dicts
+        self.phase_time: Dict[str, float] = {}
+        self.phase_calls: Dict[str, int] = {}
+        self.reset()
+
+    def reset(self) -> None:
+        self.depth = 0
+        self.elapsed = 0.0
+        self.nodes_by_ply: List[int] = []
+        self.expanded = 0          # interior nodes whose children were searched
+        self.children = 0          # children searched across those nodes
+        self.cutoffs = 0           # expansions stopped early by alpha >= beta
+        self.first_move_cutoffs = 0  # ... already on the first child
+        for p in PHASES:
+            self.phase_time[p] = 0.0
+            self.phase_calls[p] = 0
+
+    def node(self, ply: int) -> None:
+        counts = self.nodes_by_ply
+        while len(counts) <= ply:
+            counts.append(0)
+        counts[ply] += 1
+
+    def expansion(self, children: int, cutoff_at: int) -> None:
+        """children searched at one node; cutoff_at is the cutting child's index or -1."""
+        self.expanded += 1
+        self.children += children
+        if cutoff_at >= 0:
+            self.cutoffs += 1
+            if cutoff_at == 0:
+                self.first_move_cutoffs += 1
+
+    def timed(self, phase: str, fn: Callable) -> Callable:
+        """Wrap fn so its wall time is added to phase."""
+        phase_time = self.phase_time
+        phase_calls = self.phase_calls
+        perf_counter = time.perf_counter
+
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                phase_time[phase] += perf_counter() - start
+                phase_calls[phase] += 1
+        return wrapper
+
+    def to_dict(self) -> dict:
+        nodes = sum(self.nodes_by_ply)
+        return {
+            'depth': self.depth,
+            'seconds': self.elapsed,
+            'nodes': nodes,
+            'nodes_per_sec': nodes / self.elapsed if self.elapsed > 0 else 0.0,
+            'nodes_by_ply': list(self.nodes_by_ply),
+            'branching_factor': self.children / self.expanded if self.expanded else 0.0,
+            'cutoff_rate': self.cutoffs / self.expanded if self.expanded else 0.0,
+            'first_move_cutoff_rate': self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0,
+            'phase_seconds': dict(self.phase_time),
+            'phase_calls': dict(self.phase_calls),
+        }
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def summary(self) -> List[str]:
+        """Short human-readable lines, e.g. for the in-game debug overlay."""
+        d = self.to_dict()
+        lines = [
+            f"depth {d['depth']}  {d['nodes']:,} nodes  {d['seconds'] * 1000:.0f} ms",
+            f"{d['nodes_per_sec']:,.0f} nodes/s  branching {d['branching_factor']:.1f}",
+            f"cutoffs {d['cutoff_rate']:.0%}  first-move {d['first_move_cutoff_rate']:.0%}",
+            "nodes/ply " + " ".join(str(n) for n in d['nodes_by_ply']),
+        ]
+        for phase in PHASES:
+            lines.append(f"{phase:<12}{d['phase_seconds'][phase] * 1000:8.1f} ms"
+                         f"  ({d['phase_calls'][phase]} calls)")
+        return lines
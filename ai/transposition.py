@@ -0,0 +1,72 @@
+from typing import Optional, Tuple
+
+# bound types
+EXACT = 0
+LOWER = 1   # value is a lower bound (search failed high)
+UPPER = 2   # value is an upper bound (search failed low)
+
+# entry layout: (key, depth, value, flag, move, generation)
+Entry = Tuple[int, int, float, int, Optional[tuple], int]
+
+
+class TranspositionTable:
+    """
+    Fixed-size transposition table keyed by GameState.zobrist_key().
+
+    Slots are paired into buckets of two:
+    - the even slot is depth-preferred: it is only overwritten by a search
+      at least as deep, or by anything once its entry is from an older
+      search (generation)
+    - the odd slot is always-replace and catches everything else
+    """
+
+    def __init__(self, size_log2: int = 18):
+        self.size = 1 << size_log2
+        self._mask = (self.size - 1) & ~1
+        self._slots: list = [None] * self.size
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def new_search(self) -> None:
+        """Age existing entries so the next search may overwrite them freely."""
+        self.generation += 1
+
+    def clear(self) -> None:
+        self._slots = [None] * self.size
+        self.hits = self.misses = self.stores = 0
+
+    def probe(self, key: int) -> Optional[Entry]:
+        i = key & self._mask
+        slots = self._slots
+        e = slots[i]
+        if e is not None and e[0] == key:
+            self.hits += 1
+            return e
+        e = slots[i + 1]
+        if e is not None and e[0] == key:
+            self.hits += 1
+            return e
+        self.misses += 1
+        return None
+
+    def store(self, key: int, depth: int, value: float, flag: int, move: Optional[tuple]) -> None:
+        i = key & self._mask
+        slots = self._slots
+        entry = (key, depth, value, flag, move, self.generation)
+        old = slots[i]
+        if old is None or old[0] == key or depth >= old[1] or old[5] != self.generation:
+            slots[i] = entry
+        else:
+            slots[i + 1] = entry
+        self.stores += 1
+
+    def stats(self) -> dict:
+        probes = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'stores': self.stores,
+            'hit_rate': self.hits / probes if probes else 0.0,
+        }
@@ -0,0 +1,322 @@
+"""
+Benchmarks for the engine hot paths.
+
+Run from the project root:
+    python -m benchmarks.bench_engine                      # print results
+    python -m benchmarks.bench_engine --out results.json   # also write JSON
+    python -m benchmarks.bench_engine --save-baseline      # refresh the stored baseline
+    python -m benchmarks.bench_engine --compare            # fail on regressions
+
+Every benchmark runs on fixed positions built by seeded random play, so
+numbers from different commits are comparable on the same machine -- and
+only there: before --compare, save a baseline from the reference commit
+on the machine doing the comparison. Even there the speed of the machine
+drifts, so a fixed pure-Python loop is timed right before every benchmark
+and comparisons are made relative to it. Each benchmark is measured in
+--runs separate passes and the median pass is kept. Results report
+ops/sec (or nodes/sec and ms/move for the search) and the peak traced
+memory of one extra, separately measured run.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+from game.game_state import GameState
+from game.board import Board
+from game.bitboard import BitBoard
+from game.rules import legal_moves
+from game.pathfinding import bfs_has_path, bfs_shortest_path_length
+from ai.ai import MinimaxAI
+
+SIZES = (9, 11, 13)
+BACKENDS = {'list': Board, 'bit': BitBoard}
+SEED = 1234
+POSITIONS_PER_SIZE = 8
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+DEFAULT_THRESHOLD = 0.25  # flag anything more than 25% slower than the baseline
+DEFAULT_RUNS = 3  # the median of this many passes; single passes vary by about 15%
+
+
+def make_positions(size: int, board_cls: type, count: int = POSITIONS_PER_SIZE, seed: int = SEED) -> List[GameState]:
+    """Mid-game positions from seeded random play (about a third of the moves are walls)."""
+    rnd = random.Random(seed * 100 + size)
+    positions = []
+    while len(positions) < count:
+        state = GameState(size, board_cls=board_cls)
+        for _ in range(rnd.randrange(6, 24)):
+            if state.winner is not None:
+                break
+            if rnd.random() < 0.35 and state.players[state.current].walls > 0:
+                walls = state.legal_walls()
+                if walls:
+                    state.apply(('W',) + rnd.choice(walls), checked=True)
+                    continue
+            state.apply(('M',) + rnd.choice(state.legal_moves(state.current)), checked=True)
+        if state.winner is None:
+            positions.append(state)
+    return positions
+
+
+def _time_ops(fn: Callable[[], int], min_time: float, repeats: int = 5) -> Tuple[float, int]:
+    """
+    Call fn (which returns how many ops it did) for min_time seconds split
+    into rounds; return (best round's ops/sec, total ops). Taking the best
+    round keeps noise from other processes out of the comparison.
+    """
+    fn()  # warm-up
+    best = 0.0
+    total = 0
+    for _ in range(repeats):
+        ops = 0
+        start = time.perf_counter()
+        elapsed = 0.0
+        while elapsed < min_time / repeats:
+            ops += fn()
+            elapsed = time.perf_counter() - start
+        best = max(best, ops / elapsed)
+        total += ops
+    return best, total
+
+
+def _calibration() -> int:
+    # engine-independent interpreter work: dict updates and integer arithmetic
+    counts = {}
+    for i in range(2000):
+        counts[i & 63] = counts.get(i & 63, 0) + i
+    return 1
+
+
+def calibration_rate(min_time: float) -> float:
+    """ops/sec of a fixed loop that no engine change affects: the machine's current speed."""
+    return _time_ops(_calibration, min_time)[0]
+
+
+def _peak_memory(fn: Callable[[], int]) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def _bench_is_blocked(positions: List[GameState]) -> Callable[[], int]:
+    n = positions[0].board.size
+    edges = [(r, c, r + dr, c + dc) for r in range(n) for c in range(n)
+             for dr, dc in ((1, 0), (-1, 0), (0, 1), (0, -1))]
+
+    def run():
+        for st in positions:
+            blocked = st.board.is_blocked
+            for r1, c1, r2, c2 in edges:
+                blocked(r1, c1, r2, c2)
+        return len(positions) * len(edges)
+    return run
+
+
+def _bench_legal_moves(positions: List[GameState]) -> Callable[[], int]:
+    def run():
+        for st in positions:
+            legal_moves(st.board, st.players, 0)
+            legal_moves(st.board, st.players, 1)
+        return 2 * len(positions)
+    return run
+
+
+def _bench_bfs_has_path(positions: List[GameState]) -> Callable[[], int]:
+    def run():
+        for st in positions:
+            n = st.board.size
+            bfs_has_path(st.board, st.players[0].pos(), [n - 1])
+            bfs_has_path(st.board, st.players[1].pos(), [0])
+        return 2 * len(positions)
+    return run
+
+
+def _bench_bfs_shortest(positions: List[GameState]) -> Callable[[], int]:
+    def run():
+        for st in positions:
+            n = st.board.size
+            bfs_shortest_path_length(st.board, st.players[0].pos(), [n - 1])
+            bfs_shortest_path_length(st.board, st.players[1].pos(), [0])
+        return 2 * len(positions)
+    return run
+
+
+def _bench_clone(positions: List[GameState]) -> Callable[[], int]:
+    def run():
+        for st in positions:
+            st.clone()
+        return len(positions)
+    return run
+
+
+MICRO_BENCHMARKS = {
+    'is_blocked': _bench_is_blocked,
+    'legal_moves': _bench_legal_moves,
+    'bfs_has_path': _bench_bfs_has_path,
+    'bfs_shortest_path_length': _bench_bfs_shortest,
+    'clone': _bench_clone,
+}
+
+
+def bench_choose_move(positions: List[GameState], depth: int) -> Dict[str, float]:
+    """nodes/sec of a fresh MinimaxAI over the positions (interior nodes, TT reset each time)."""
+    nodes = 0
+    elapsed = 0.0
+    for st in positions:
+        # best of two fresh searches per position, for the same reason as _time_ops
+        times = []
+        for _ in range(2):
+            ai = MinimaxAI(max_depth=depth)
+            start = time.perf_counter()
+            ai.choose_move(st, st.current)
+            times.append(time.perf_counter() - start)
+        elapsed += min(times)
+        nodes += ai.nodes
+
+    def once():
+        MinimaxAI(max_depth=depth).choose_move(positions[0], positions[0].current)
+        return 1
+    return {
+        'nodes': nodes,
+        'seconds': elapsed,
+        'nodes_per_sec': nodes / elapsed if elapsed > 0 else 0.0,
+        'ms_per_move': 1000.0 * elapsed / len(positions),
+        'peak_bytes': _peak_memory(once),
+    }
+
+
+def run_all(sizes=SIZES, backends=tuple(BACKENDS), min_time: float = 0.5, search_depth: int = 2,
+            search_positions: int = 3, only: str = '') -> Dict[str, dict]:
+    results: Dict[str, dict] = {}
+    for size in sizes:
+        for backend in backends:
+            positions = make_positions(size, BACKENDS[backend])
+            for name, factory in MICRO_BENCHMARKS.items():
+                key = f'{name}/{size}/{backend}'
+                if only and only not in key:
+                    continue
+                fn = factory(positions)
+                calibration = calibration_rate(min_time / 5)
+                ops_per_sec, ops = _time_ops(fn, min_time)
+                results[key] = {'ops_per_sec': ops_per_sec, 'ops': ops, 'peak_bytes': _peak_memory(fn),
+                                'calibration': calibration}
+                print(f'{key:40s} {ops_per_sec:14,.0f} ops/s', flush=True)
+            key = f'choose_move_d{search_depth}/{size}/{backend}'
+            if only and only not in key:
+                continue
+            calibration = calibration_rate(min_time / 5)
+            results[key] = bench_choose_move(positions[:search_positions], search_depth)
+            results[key]['calibration'] = calibration
+            print(f'{key:40s} {results[key]["nodes_per_sec"]:14,.0f} nodes/s'
+                  f' ({results[key]["ms_per_move"]:.0f} ms/move)', flush=True)
+    return results
+
+
+def rate(result: dict) -> float:
+    """
+    Throughput compared against the baseline: ops/sec, or moves/sec for the
+    search, since nodes/sec would count better pruning as a slowdown.
+    """
+    if 'ops_per_sec' in result:
+        return result['ops_per_sec']
+    ms = result.get('ms_per_move', 0.0)
+    return 1000.0 / ms if ms > 0 else 0.0
+
+
+def relative_rate(result: dict) -> float:
+    """rate() per unit of calibration loop speed measured alongside it (older results have none)."""
+    return rate(result) / result.get('calibration', 1.0)
+
+
+def median_results(runs: List[Dict[str, dict]]) -> Dict[str, dict]:
+    """Per benchmark, the pass with the median rate, so one noisy pass decides nothing."""
+    merged = {}
+    for key in runs[0]:
+        ordered = sorted((run[key] for run in runs), key=relative_rate)
+        merged[key] = ordered[len(ordered) // 2]
+    return merged
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    """
+    Names of benchmarks whose throughput dropped by more than threshold
+    against the baseline, both taken relative to the calibration loop.
+    """
+    regressions = []
+    for key, res in results.items():
+        base = baseline.get(key)
+        if base is None or rate(base) <= 0:
+            continue
+        if 'calibration' in base and 'calibration' in res:
+            change = relative_rate(res) / relative_rate(base) - 1.0
+        else:
+            change = rate(res) / rate(base) - 1.0
+        flag = ''
+        if change < -threshold:
+            regressions.append(key)
+            flag = '  REGRESSION'
+        print(f'{key:40s} {change:+8.1%}{flag}')
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the Quoridor engine hot paths.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES))
+    parser.add_argument('--backends', nargs='+', choices=sorted(BACKENDS), default=sorted(BACKENDS))
+    parser.add_argument('--min-time', type=float, default=0.5, help='seconds per micro benchmark')
+    parser.add_argument('--depth', type=int, default=2, help='search depth for choose_move')
+    parser.add_argument('--only', default='', help='run only benchmarks whose name contains this')
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS, help='passes per benchmark; the median is kept')
+    parser.add_argument('--out', help='write results as JSON to this file')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help='overwrite the baseline with these results')
+    parser.add_argument('--compare', action='store_true', help='compare against the baseline; exit 1 on regression')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    runs = []
+    for i in range(max(1, args.runs)):
+        print(f'-- pass {i + 1} of {max(1, args.runs)}')
+        runs.append(run_all(args.sizes, args.backends, args.min_time, args.depth, only=args.only))
+    results = median_results(runs)
+    report = {
+        'meta': {
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'seed': SEED,
+            'runs': len(runs),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'baseline written to {args.baseline}')
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f'no baseline at {args.baseline}')
+            return 1
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f'{len(regressions)} regression(s) beyond {args.threshold:.0%}')
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,245 @@
+from typing import Dict, List, Tuple
+from .board import Board, BOARD_N
+from .zobrist import zobrist_table
+
+# Per-size masks, built once and shared by every BitBoard of that size.
+# For wall slot i = wr*(size-1) + wc:
+#   h_conflict[i] / v_conflict[i] -> (mask over own orientation, mask over the other)
+#   h_edges[i] / v_edges[i]       -> bits of the cell edges the wall cuts
+#   h_points[i] / v_points[i]     -> per wall point: (on board edge, h mask, v mask)
+#                                    where the masks cover the walls through that point
+_MASKS: Dict[int, Tuple[list, list, list, list, list, list]] = {}
+
+
+def _build_masks(size: int):
+    s = size - 1
+    h_conflict, v_conflict, h_edges, v_edges = [], [], [], []
+    for wr in range(s):
+        for wc in range(s):
+            i = wr * s + wc
+            own = 1 << i
+            if wc > 0:
+                own |= 1 << (i - 1)
+            if wc < s - 1:
+                own |= 1 << (i + 1)
+            h_conflict.append((own, 1 << i))
+            own = 1 << i
+            if wr > 0:
+                own |= 1 << (i - s)
+            if wr < s - 1:
+                own |= 1 << (i + s)
+            v_conflict.append((own, 1 << i))
+            # horizontal wall under cells (wr, wc) and (wr, wc+1) cuts their "down" edges
+            h_edges.append((1 << (wr * size + wc)) | (1 << (wr * size + wc + 1)))
+            # vertical wall right of cells (wr, wc) and (wr+1, wc) cuts their "right" edges
+            v_edges.append((1 << (wr * size + wc)) | (1 << ((wr + 1) * size + wc)))
+    points = {}
+    probe = Board(size)
+    for pr in range(size + 1):
+        for pc in range(size + 1):
+            border = pr == 0 or pr == size or pc == 0 or pc == size
+            hm = vm = 0
+            for wr, wc in ((pr-1, pc), (pr-1, pc-1), (pr-1, pc-2)):
+                if 0 <= wr < s and 0 <= wc < s:
+                    hm |= 1 << (wr * s + wc)
+            for wr, wc in ((pr, pc-1), (pr-1, pc-1), (pr-2, pc-1)):
+                if 0 <= wr < s and 0 <= wc < s:
+                    vm |= 1 << (wr * s + wc)
+            points[(pr, pc)] = (border, hm, vm)
+    h_points, v_points = [], []
+    for wr in range(s):
+        for wc in range(s):
+            h_points.append([points[p] for p in probe.wall_points('H', wr, wc)])
+            v_points.append([points[p] for p in probe.wall_points('V', wr, wc)])
+    return h_conflict, v_conflict, h_edges, v_edges, h_points, v_points
+
+
+def _masks(size: int):
+    m = _MASKS.get(size)
+    if m is None:
+        m = _MASKS[size] = _build_masks(size)
+    return m
+
+
+class BitBoard(Board):
+    """
+    Drop-in replacement for Board that packs walls into integers.
+
+    h_bits / v_bits hold one bit per wall slot (wr*(size-1) + wc).
+    down_blocked / right_blocked hold one bit per cell (r*size + c) telling
+    whether the edge to the cell below / to the right is cut by a wall, so
+    placement checks and is_blocked are single bit tests.
+
+    h_walls / v_walls are still available as List[List[bool]] views for the
+    UI and for GameState.serialize.
+    """
+
+    def __init__(self, size: int = BOARD_N):
+        self.size = size
+        self.h_bits = 0
+        self.v_bits = 0
+        self.down_blocked = 0
+        self.right_blocked = 0
+        self._masks = _masks(size)
+        self._zobrist = zobrist_table(size)
+        self.wall_hash = 0
+
+    def __deepcopy__(self, memo):
+        # every field is an int except the shared per-size mask/Zobrist tables
+        new = BitBoard.__new__(BitBoard)
+        new.__dict__.update(self.__dict__)
+        return new
+
+    # -------------------------
+    # list-of-lists compatibility
+    # -------------------------
+    def _unpack(self, bits: int) -> List[List[bool]]:
+        s = self.size - 1
+        return [[bool(bits >> (r * s + c) & 1) for c in range(s)] for r in range(s)]
+
+    def _pack(self, grid: List[List[bool]]) -> int:
+        s = self.size - 1
+        bits = 0
+        for r in range(s):
+            for c in range(s):
+                if grid[r][c]:
+                    bits |= 1 << (r * s + c)
+        return bits
+
+    def rehash(self) -> None:
+        z = self._zobrist
+        h = 0
+        for bits, keys in ((self.h_bits, z.h), (self.v_bits, z.v)):
+            i = 0
+            while bits:
+                if bits & 1:
+                    h ^= keys[i]
+                bits >>= 1
+                i += 1
+        self.wall_hash = h
+
+    def _rebuild_edges(self) -> None:
+        h_edges, v_edges = self._masks[2], self._masks[3]
+        down = right = 0
+        bits, i = self.h_bits, 0
+        while bits:
+            if bits & 1:
+                down |= h_edges[i]
+            bits >>= 1
+            i += 1
+        bits, i = self.v_bits, 0
+        while bits:
+            if bits & 1:
+                right |= v_edges[i]
+            bits >>= 1
+            i += 1
+        self.down_blocked = down
+        self.right_blocked = right
+
+    @property
+    def h_walls(self) -> List[List[bool]]:
+        return self._unpack(self.h_bits)
+
+    @h_walls.setter
+    def h_walls(self, grid: List[List[bool]]) -> None:
+        self.h_bits = self._pack(grid)
+        self._rebuild_edges()
+        self.rehash()
+
+    @property
+    def v_walls(self) -> List[List[bool]]:
+        return self._unpack(self.v_bits)
+
+    @v_walls.setter
+    def v_walls(self, grid: List[List[bool]]) -> None:
+        self.v_bits = self._pack(grid)
+        self._rebuild_edges()
+        self.rehash()
+
+    # -------------------------
+    # Board API
+    # -------------------------
+    def can_place_horizontal(self, wr: int, wc: int) -> bool:
+        s = self.size - 1
+        if not (0 <= wr < s and 0 <= wc < s):
+            return False
+        own, other = self._masks[0][wr * s + wc]
+        return not (self.h_bits & own or self.v_bits & other)
+
+    def can_place_vertical(self, wr: int, wc: int) -> bool:
+        s = self.size - 1
+        if not (0 <= wr < s and 0 <= wc < s):
+            return False
+        own, other = self._masks[1][wr * s + wc]
+        return not (self.v_bits & own or self.h_bits & other)
+
+    def place_horizontal(self, wr: int, wc: int) -> None:
+        i = wr * (self.size - 1) + wc
+        self.h_bits |= 1 << i
+        self.down_blocked |= self._masks[2][i]
+        self.wall_hash ^= self._zobrist.h[i]
+
+    def place_vertical(self, wr: int, wc: int) -> None:
+        i = wr * (self.size - 1) + wc
+        self.v_bits |= 1 << i
+        self.right_blocked |= self._masks[3][i]
+        self.wall_hash ^= self._zobrist.v[i]
+
+    def remove_horizontal(self, wr: int, wc: int) -> None:
+        i = wr * (self.size - 1) + wc
+        self.h_bits &= ~(1 << i)
+        self.down_blocked &= ~self._masks[2][i]
+        self.wall_hash ^= self._zobrist.h[i]
+
+    def remove_vertical(self, wr: int, wc: int) -> None:
+        i = wr * (self.size - 1) + wc
+        self.v_bits &= ~(1 << i)
+        self.right_blocked &= ~self._masks[3][i]
+        self.wall_hash ^= self._zobrist.v[i]
+
+    def wall_bits(self) -> Tuple[int, int]:
+        return self.h_bits, self.v_bits
+
+    def set_wall_bits(self, h_bits: int, v_bits: int) -> None:
+        self.h_bits = h_bits
+        self.v_bits = v_bits
+        self._rebuild_edges()
+        self.rehash()
+
+    def has_horizontal(self, wr: int, wc: int) -> bool:
+        return bool(self.h_bits >> (wr * (self.size - 1) + wc) & 1)
+
+    def has_vertical(self, wr: int, wc: int) -> bool:
+        return bool(self.v_bits >> (wr * (self.size - 1) + wc) & 1)
+
+    def wall_contacts(self, orientation: str, wr: int, wc: int) -> int:
+        i = wr * (self.size - 1) + wc
+        points = self._masks[4][i] if orientation == 'H' else self._masks[5][i]
+        h_bits, v_bits = self.h_bits, self.v_bits
+        count = 0
+        for border, hm, vm in points:
+            if border or h_bits & hm or v_bits & vm:
+                count += 1
+        return count
+
+    def edge_blocked(self, edge: Tuple[int, int]) -> bool:
+        a, b = edge
+        return bool((self.right_blocked if b - a == 1 else self.down_blocked) >> a & 1)
+
+    def is_blocked(self, r1: int, c1: int, r2: int, c2: int) -> bool:
+        n = self.size
+        if not (0 <= r1 < n and 0 <= c1 < n and 0 <= r2 < n and 0 <= c2 < n):
+            return True
+        dr = r2 - r1
+        dc = c2 - c1
+        if dc == 0:
+            if dr == 1:
+                return bool(self.down_blocked >> (r1 * n + c1) & 1)
+            if dr == -1:
+                return bool(self.down_blocked >> (r2 * n + c2) & 1)
+        elif dr == 0:
+            if dc == 1:
+                return bool(self.right_blocked >> (r1 * n + c1) & 1)
+            if dc == -1:
+                return bool(self.right_blocked >> (r2 * n + c2) & 1)
+        return True  # non-adjacent
@@ -1,4 +1,6 @@
 from typing import List, Tuple
+from .tables import board_tables
+from .zobrist import zobrist_table
 
 BOARD_N = 9  # default size (9x9)
 
@@ -8,6 +10,10 @@ class Board:
         s = size - 1
         self.h_walls: List[List[bool]] = [[False]*s for _ in range(s)]
         self.v_walls: List[List[bool]] = [[False]*s for _ in range(s)]
+        # Zobrist hash of the walls on the board, updated on every place/remove
+        self._zobrist = zobrist_table(size)
+        self.wall_hash: int = 0
+        self._tables = board_tables(size)
 
     def inside(self, r: int, c: int) -> bool:
         return 0 <= r < self.size and 0 <= c < self.size
@@ -49,53 +55,102 @@ class Board:
 
     def place_horizontal(self, wr:int, wc:int) -> None:
         self.h_walls[wr][wc] = True
+        self.wall_hash ^= self._zobrist.h[wr * (self.size - 1) + wc]
 
     def place_vertical(self, wr:int, wc:int) -> None:
         self.v_walls[wr][wc] = True
+        self.wall_hash ^= self._zobrist.v[wr * (self.size - 1) + wc]
 
     def remove_horizontal(self, wr:int, wc:int) -> None:
         self.h_walls[wr][wc] = False
+        self.wall_hash ^= self._zobrist.h[wr * (self.size - 1) + wc]
 
     def remove_vertical(self, wr:int, wc:int) -> None:
         self.v_walls[wr][wc] = False
+        self.wall_hash ^= self._zobrist.v[wr * (self.size - 1) + wc]
 
-    def is_blocked(self, r1:int, c1:int, r2:int, c2:int) -> bool:
-        if not (self.inside(r1,c1) and self.inside(r2,c2)):
+    def wall_bits(self) -> Tuple[int, int]:
+        """Horizontal and vertical walls as bit masks, one bit per slot wr*(size-1) + wc."""
+        s = self.size - 1
+        masks = []
+        for grid in (self.h_walls, self.v_walls):
+            bits = 0
+            for wr, row in enumerate(grid):
+                for wc, on in enumerate(row):
+                    if on:
+                        bits |= 1 << (wr * s + wc)
+            masks.append(bits)
+        return masks[0], masks[1]
+
+    def set_wall_bits(self, h_bits: int, v_bits: int) -> None:
+        """Replace every wall on the board by the ones in the two masks."""
+        s = self.size - 1
+        self.h_walls = [[bool(h_bits >> (wr * s + wc) & 1) for wc in range(s)] for wr in range(s)]
+        self.v_walls = [[bool(v_bits >> (wr * s + wc) & 1) for wc in range(s)] for wr in range(s)]
+        self.rehash()
+
+    def has_horizontal(self, wr:int, wc:int) -> bool:
+        return self.h_walls[wr][wc]
+
+    def has_vertical(self, wr:int, wc:int) -> bool:
+        return self.v_walls[wr][wc]
+
+    def wall_points(self, orientation: str, wr: int, wc: int) -> List[Tuple[int,int]]:
+        """Grid points (corners between cells) a wall runs through: both ends and the middle."""
+        if orientation == 'H':
+            return [(wr+1, wc), (wr+1, wc+1), (wr+1, wc+2)]
+        return [(wr, wc+1), (wr+1, wc+1), (wr+2, wc+1)]
+
+    def point_touched(self, pr: int, pc: int) -> bool:
+        """True if grid point (pr, pc) lies on the board edge or on a placed wall."""
+        n = self.size
+        if pr == 0 or pr == n or pc == 0 or pc == n:
             return True
-        dr = r2 - r1
-        dc = c2 - c1
-        if abs(dr) + abs(dc) != 1:
-            return True  # non-adjacent
-        # Moving down
-        if dr == 1 and dc == 0:
-            s = self.size - 1
-            if 0 <= r1 < s and 0 <= c1 < s and self.h_walls[r1][c1]:
+        s = n - 1
+        for wr, wc in ((pr-1, pc), (pr-1, pc-1), (pr-1, pc-2)):
+            if 0 <= wr < s and 0 <= wc < s and self.has_horizontal(wr, wc):
                 return True
-            if 0 <= r1 < s and 0 <= (c1-1) < s and self.h_walls[r1][c1-1]:
-                return True
-            return False
-        # Moving up
-        if dr == -1 and dc == 0:
-            s = self.size - 1
-            if 0 <= r2 < s and 0 <= c2 < s and self.h_walls[r2][c2]:
-                return True
-            if 0 <= r2 < s and 0 <= (c2-1) < s and self.h_walls[r2][c2-1]:
-                return True
-            return False
-        # Moving right
-        if dc == 1 and dr == 0:
-            s = self.size - 1
-            if 0 <= r1 < s and 0 <= c1 < s and self.v_walls[r1][c1]:
+        for wr, wc in ((pr, pc-1), (pr-1, pc-1), (pr-2, pc-1)):
+            if 0 <= wr < s and 0 <= wc < s and self.has_vertical(wr, wc):
                 return True
-            if 0 <= (r1-1) < s and 0 <= c1 < s and self.v_walls[r1-1][c1]:
-                return True
-            return False
-        # Moving left
-        if dc == -1 and dr == 0:
-            s = self.size - 1
-            if 0 <= r2 < s and 0 <= c2 < s and self.v_walls[r2][c2]:
-                return True
-            if 0 <= (r2-1) < s and 0 <= c2 < s and self.v_walls[r2-1][c2]:
+        return False
+
+    def wall_contacts(self, orientation: str, wr: int, wc: int) -> int:
+        """
+        How many of the wall's three points already touch the board edge or
+        another wall. A wall with fewer than two contacts hangs free at one
+        end, so it cannot close off any region of the board.
+        """
+        return sum(1 for pr, pc in self.wall_points(orientation, wr, wc) if self.point_touched(pr, pc))
+
+    def rehash(self) -> None:
+        """Recompute wall_hash from scratch (after h_walls/v_walls were reassigned)."""
+        s = self.size - 1
+        z = self._zobrist
+        h = 0
+        for wr, row in enumerate(self.h_walls):
+            for wc, on in enumerate(row):
+                if on:
+                    h ^= z.h[wr * s + wc]
+        for wr, row in enumerate(self.v_walls):
+            for wc, on in enumerate(row):
+                if on:
+                    h ^= z.v[wr * s + wc]
+        self.wall_hash = h
+
+    def is_blocked(self, r1:int, c1:int, r2:int, c2:int) -> bool:
+        n = self.size
+        if not (0 <= r1 < n and 0 <= c1 < n and 0 <= r2 < n and 0 <= c2 < n):
+            return True
+        a, b = r1 * n + c1, r2 * n + c2
+        edge = (a, b) if a < b else (b, a)
+        if edge not in self._tables.walls:
+            return True  # non-adjacent
+        return self.edge_blocked(edge)
+
+    def edge_blocked(self, edge: Tuple[int, int]) -> bool:
+        """True if a wall cuts edge, a (low, high) pair of adjacent flat cells (see game.tables)."""
+        for orient, wr, wc in self._tables.walls[edge]:
+            if (self.h_walls if orient == 'H' else self.v_walls)[wr][wc]:
                 return True
-            return False
-        return True
+        return False
@@ -1,32 +1,52 @@
+import hashlib
+import struct
 from typing import List, Tuple, Optional
 from copy import deepcopy
 from .board import Board
 from .player import Player
-from .rules import legal_moves
-from .pathfinding import bfs_has_path
+from .rules import cached_legal_moves
+from .pathfinding import bfs_has_path, shortest_path_edges
+from .tables import board_tables
+
+# to_bytes() layout: size, flags (bit 0 side to move, bits 1-2 winner + 1),
+# then row, column and walls in hand of each player, followed by the
+# horizontal and vertical wall masks, (size-1)^2 bits each, little-endian
+POSITION_HEADER = struct.Struct('<BB6B')
+
+WALLS_PER_PLAYER = 10
+
+Action = Tuple  # ('M', r, c) or ('W', 'H'|'V', wr, wc)
 
 class GameState:
-    def __init__(self, size: int = 9):
-        self.board = Board(size)
+    def __init__(self, size: int = 9, board_cls: type = Board):
+        # board_cls may be Board (list grids) or BitBoard (packed bitmasks)
+        self.board = board_cls(size)
         mid = size // 2
         self.players: List[Player] = [
-            Player(0, mid, walls=10, is_ai=False, id=0),
-            Player(size-1, mid, walls=10, is_ai=False, id=1)
+            Player(0, mid, walls=WALLS_PER_PLAYER, is_ai=False, id=0),
+            Player(size-1, mid, walls=WALLS_PER_PLAYER, is_ai=False, id=1)
         ]
         self.current: int = 0
         self.winner: Optional[int] = None
-        self.history: List[dict] = []  # simple history for undo (shallow serializable snapshots)
         self.observers = []
+        # one small record per move played, oldest first: the move history,
+        # and everything undo needs (see apply)
+        self._undo_stack: List[tuple] = []
 
     def clone(self) -> 'GameState':
         # Temporarily clear observers to avoid deepcopying UI components (like GameWindow)
         # which cannot be pickled/deepcopied.
         obs = self.observers
+        log = self._undo_stack
         self.observers = []
+        self._undo_stack = []
         try:
             new_state = deepcopy(self)
         finally:
             self.observers = obs
+            self._undo_stack = log
+        # the records are immutable tuples, so the copy can share them
+        new_state._undo_stack = log[:]
         return new_state
 
     def serialize(self) -> dict:
@@ -41,53 +61,116 @@ class GameState:
             'winner': self.winner
         }
 
-    def save_snapshot(self):
-        self.history.append(self.serialize())
+    def to_bytes(self) -> bytes:
+        """
+        The position in a few dozen bytes (24 on 9x9, 44 on 13x13): walls,
+        pawns, walls in hand, side to move and winner. Player names and the
+        move history are not included.
+        """
+        n = self.board.size
+        mask_len = ((n - 1) * (n - 1) + 7) // 8
+        h_bits, v_bits = self.board.wall_bits()
+        p0, p1 = self.players
+        flags = self.current | (0 if self.winner is None else self.winner + 1) << 1
+        return (POSITION_HEADER.pack(n, flags, p0.r, p0.c, p0.walls, p1.r, p1.c, p1.walls)
+                + h_bits.to_bytes(mask_len, 'little') + v_bits.to_bytes(mask_len, 'little'))
+
+    @classmethod
+    def from_bytes(cls, data: bytes, board_cls: type = Board) -> 'GameState':
+        """
+        Inverse of to_bytes(), on a board of board_cls. Raises ValueError
+        for data that to_bytes() could not have produced.
+        """
+        if len(data) < POSITION_HEADER.size:
+            raise ValueError(f'{len(data)} bytes is too short for an encoded position')
+        n, flags, r0, c0, w0, r1, c1, w1 = POSITION_HEADER.unpack_from(data)
+        if n < 2:
+            raise ValueError(f'invalid board size {n}')
+        slots = (n - 1) * (n - 1)
+        mask_len = (slots + 7) // 8
+        if len(data) != POSITION_HEADER.size + 2 * mask_len:
+            raise ValueError(f'{len(data)} bytes is not an encoded {n}x{n} position')
+        if flags >> 3 or flags >> 1 == 3:
+            raise ValueError(f'invalid flags {flags:#x}')
+        if max(r0, c0, r1, c1) >= n or (r0, c0) == (r1, c1):
+            raise ValueError('pawns off the board or on the same cell')
+        if max(w0, w1) > WALLS_PER_PLAYER:
+            raise ValueError(f'more than {WALLS_PER_PLAYER} walls in hand')
+        start = POSITION_HEADER.size
+        h_bits = int.from_bytes(data[start:start + mask_len], 'little')
+        v_bits = int.from_bytes(data[start + mask_len:], 'little')
+        if (h_bits | v_bits) >> slots:
+            raise ValueError(f'wall bits beyond the {slots} slots of a {n}x{n} board')
+        state = cls(n, board_cls=board_cls)
+        state.board.set_wall_bits(h_bits, v_bits)
+        p0, p1 = state.players
+        p0.r, p0.c, p0.walls = r0, c0, w0
+        p1.r, p1.c, p1.walls = r1, c1, w1
+        state.current = flags & 1
+        state.winner = (flags >> 1) - 1 if flags >> 1 else None
+        return state
+
+    def stable_hash(self) -> int:
+        """
+        64-bit hash of to_bytes(): the same for the same position in every
+        process, Python version and board class, unlike hash() of anything.
+        """
+        return int.from_bytes(hashlib.blake2b(self.to_bytes(), digest_size=8).digest(), 'little')
 
     def undo(self) -> bool:
-        if not self.history:
+        """Take back the last move, whichever way it was played."""
+        return self.undo_last()
+
+    def rewind(self, ply: int) -> bool:
+        """Take back moves until only the first ply of them remain."""
+        if not 0 <= ply <= len(self._undo_stack):
             return False
-        snap = self.history.pop()
-        # restore
-        b = snap['board']
-        self.board.h_walls = [row[:] for row in b['h']]
-        self.board.v_walls = [row[:] for row in b['v']]
-        self.board.size = b['size']
-        for i, pdata in enumerate(snap['players']):
-            self.players[i].r = pdata['r']
-            self.players[i].c = pdata['c']
-            self.players[i].walls = pdata['walls']
-            self.players[i].is_ai = pdata.get('is_ai', False)
-            self.players[i].id = pdata.get('id', i)
-        self.current = snap['current']
-        self.winner = snap['winner']
+        while len(self._undo_stack) > ply:
+            self.undo_last()
         return True
 
+    def moves(self) -> List[Action]:
+        """The moves played so far, oldest first, as apply() actions."""
+        return [('M', rec[4], rec[5]) if rec[0] == 'M' else ('W', rec[2], rec[3], rec[4])
+                for rec in self._undo_stack]
+
+    def zobrist_key(self) -> int:
+        """
+        64-bit position key: walls on the board, both pawns, walls in hand and
+        side to move. The wall part is kept incrementally by the board, so
+        this is a handful of xors.
+        """
+        z = self.board._zobrist
+        n = self.board.size
+        p0, p1 = self.players
+        key = (self.board.wall_hash
+               ^ z.pawn[0][p0.r * n + p0.c] ^ z.pawn[1][p1.r * n + p1.c]
+               ^ z.walls[0][p0.walls] ^ z.walls[1][p1.walls])
+        if self.current:
+            key ^= z.side
+        return key
+
     def inside(self, r:int, c:int) -> bool:
         return self.board.inside(r, c)
 
-    def legal_moves(self, player_index: int):
-        return legal_moves(self.board, self.players, player_index)
+    def legal_moves(self, player_index: int) -> Tuple[Tuple[int, int], ...]:
+        """Pawn destinations in generation order (cached, immutable)."""
+        return cached_legal_moves(self.board, self.players, player_index)[0]
+
+    def is_legal_pawn_move(self, r: int, c: int, player_index: Optional[int] = None) -> bool:
+        """Whether the side to move (or player_index) may step or jump to (r, c); a set lookup."""
+        if player_index is None:
+            player_index = self.current
+        return (r, c) in cached_legal_moves(self.board, self.players, player_index)[1]
 
     def move_pawn(self, player_index: int, r: int, c: int) -> bool:
         if self.winner is not None:
             return False
         if player_index != self.current:
             return False
-        moves = self.legal_moves(player_index)
-        if (r, c) not in moves:
+        if not self.is_legal_pawn_move(r, c, player_index):
             return False
-        # snapshot for undo
-        self.save_snapshot()
-        p = self.players[player_index]
-        p.r = r
-        p.c = c
-        # check win
-        if player_index == 0 and r == self.board.size - 1:
-            self.winner = 0
-        if player_index == 1 and r == 0:
-            self.winner = 1
-        self.current = 1 - self.current
+        self.apply(('M', r, c), checked=True)
         self.notify_observers()
         return True
 
@@ -95,18 +178,10 @@ class GameState:
         s = self.board.size - 1
         if not (0 <= wr < s and 0 <= wc < s):
             return False
+        # can_place_* already rejects placement on top of an existing wall
         if orientation == 'H':
-            if not self.board.can_place_horizontal(wr, wc):
-                return False
-        else:
-            if not self.board.can_place_vertical(wr, wc):
-                return False
-        # also don't allow placement on top of existing wall
-        if orientation == 'H' and self.board.h_walls[wr][wc]:
-            return False
-        if orientation == 'V' and self.board.v_walls[wr][wc]:
-            return False
-        return True
+            return self.board.can_place_horizontal(wr, wc)
+        return self.board.can_place_vertical(wr, wc)
 
     def try_place_wall(self, player_index: int, orientation: str, wr: int, wc: int) -> bool:
         """
@@ -120,35 +195,150 @@ class GameState:
             return False
         if player_index != self.current:
             return False
-        p = self.players[player_index]
-        if p.walls <= 0:
-            return False
-        if not self.can_place_wall(orientation, wr, wc):
+        if not self.apply(('W', orientation, wr, wc)):
             return False
-        # tentative
+        self.notify_observers()
+        return True
+
+    def _place_wall_checked(self, orientation: str, wr: int, wc: int) -> bool:
+        """Place the wall tentatively and keep it only if every player still has a path."""
+        # a wall touching the border/other walls at fewer than two points cannot close anything off
+        may_disconnect = self.board.wall_contacts(orientation, wr, wc) >= 2
         if orientation == 'H':
             self.board.place_horizontal(wr, wc)
         else:
             self.board.place_vertical(wr, wc)
+        if not may_disconnect:
+            return True
         # path check for every player
-        ok = True
         for pl in self.players:
             goal_rows = [self.board.size - 1] if pl is self.players[0] else [0]
             if not bfs_has_path(self.board, (pl.r, pl.c), goal_rows):
-                ok = False
-                break
-        if not ok:
-            # revert
-            if orientation == 'H':
+                # revert
+                if orientation == 'H':
+                    self.board.remove_horizontal(wr, wc)
+                else:
+                    self.board.remove_vertical(wr, wc)
+                return False
+        return True
+
+    # -------------------------
+    # In-place make/unmake for search
+    # -------------------------
+    def legal_walls(self, candidates=None) -> List[Tuple[str, int, int]]:
+        """
+        Validate many wall placements for the side to move in one pass.
+        candidates: iterable of (orient, wr, wc); every slot when omitted.
+
+        Each player's shortest path is found once. A candidate then needs a
+        path search only if it touches the border/other walls at two or more
+        points and also cuts an edge of one of those paths; everything else
+        is decided by table lookups.
+        """
+        if self.winner is not None or self.players[self.current].walls <= 0:
+            return []
+        board = self.board
+        n = board.size
+        if candidates is None:
+            candidates = [(o, wr, wc) for wr in range(n - 1) for wc in range(n - 1) for o in ('H', 'V')]
+        cut_edges = board_tables(n).edges
+        paths = []
+        for i, pl in enumerate(self.players):
+            path = shortest_path_edges(board, (pl.r, pl.c), n - 1 if i == 0 else 0)
+            paths.append(path if path is not None else set())
+        placeable = []
+        suspects = []  # walls that might cut a player off, still need a path search
+        for orient, wr, wc in candidates:
+            if not self.can_place_wall(orient, wr, wc):
+                continue
+            suspect = False
+            if board.wall_contacts(orient, wr, wc) >= 2:
+                for e in cut_edges[(orient, wr, wc)]:
+                    if e in paths[0] or e in paths[1]:
+                        suspect = True
+                        break
+            placeable.append((orient, wr, wc, suspect))
+            if suspect:
+                suspects.append((orient, wr, wc))
+
+        cut_off = set()
+        for orient, wr, wc in suspects:
+            if not self._place_wall_checked(orient, wr, wc):
+                cut_off.add((orient, wr, wc))
+            elif orient == 'H':
+                board.remove_horizontal(wr, wc)
+            else:
+                board.remove_vertical(wr, wc)
+        return [(o, wr, wc) for o, wr, wc, suspect in placeable
+                if not (suspect and (o, wr, wc) in cut_off)]
+
+    def apply(self, action: Action, checked: bool = False) -> bool:
+        """
+        Play ('M', r, c) or ('W', orient, wr, wc) for the side to move, in place.
+        Unlike move_pawn/try_place_wall this notifies no observers.
+        The move is logged as ('M', player, old r, old c, r, c) or
+        ('W', player, orient, wr, wc), which is all undo_last() needs.
+        checked=True skips validation, for actions that came from
+        legal_moves()/legal_walls() for this same position.
+        """
+        if self.winner is not None:
+            return False
+        pi = self.current
+        p = self.players[pi]
+        if action[0] == 'M':
+            _, r, c = action
+            if not checked and not self.is_legal_pawn_move(r, c, pi):
+                return False
+            self._undo_stack.append(('M', pi, p.r, p.c, r, c))
+            p.r = r
+            p.c = c
+            if (pi == 0 and r == self.board.size - 1) or (pi == 1 and r == 0):
+                self.winner = pi
+        else:
+            _, orient, wr, wc = action
+            if checked:
+                if orient == 'H':
+                    self.board.place_horizontal(wr, wc)
+                else:
+                    self.board.place_vertical(wr, wc)
+            else:
+                if p.walls <= 0 or not self.can_place_wall(orient, wr, wc):
+                    return False
+                if not self._place_wall_checked(orient, wr, wc):
+                    return False
+            self._undo_stack.append(('W', pi, orient, wr, wc))
+            p.walls -= 1
+        self.current = 1 - pi
+        return True
+
+    def last_wall(self) -> Optional[Tuple[str, int, int]]:
+        """(orient, wr, wc) of the most recent wall played with apply(), or None."""
+        for rec in reversed(self._undo_stack):
+            if rec[0] == 'W':
+                return rec[2], rec[3], rec[4]
+        return None
+
+    def undo_last(self) -> bool:
+        """Revert the most recent move, in constant time."""
+        if not self._undo_stack:
+            return False
+        rec = self._undo_stack.pop()
+        pi = rec[1]
+        p = self.players[pi]
+        if rec[0] == 'M':
+            p.r = rec[2]
+            p.c = rec[3]
+        else:
+            _, _, orient, wr, wc = rec
+            if orient == 'H':
                 self.board.remove_horizontal(wr, wc)
             else:
                 self.board.remove_vertical(wr, wc)
-            return False
-        # commit
-        self.save_snapshot()
-        p.walls -= 1
-        self.current = 1 - self.current
-        self.notify_observers()
+            p.walls += 1
+        # apply() refuses to play once the game is won, so the undone move
+        # is the only one that could have set the winner
+        self.winner = None
+        self.current = pi
         return True
 
     def get_winner(self) -> Optional[int]:
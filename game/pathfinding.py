@@ -1,44 +1,178 @@
 from collections import deque
 from typing import Tuple, List, Optional
 from .board import Board
+from .tables import board_tables, wall_cut_edges
 
 def bfs_has_path(board: Board, start: Tuple[int,int], goal_rows: List[int]) -> bool:
     """Return True if any cell in goal_rows is reachable from start (row in goal_rows)."""
-    q = deque([start])
-    visited = set()
-    while q:
-        r, c = q.popleft()
-        if (r, c) in visited:
-            continue
-        visited.add((r, c))
-        if r in goal_rows:
-            return True
-        for dr, dc in [(1,0),(-1,0),(0,1),(0,-1)]:
-            nr, nc = r+dr, c+dc
-            if not board.inside(nr, nc):
-                continue
-            if board.is_blocked(r, c, nr, nc):
-                continue
-            if (nr, nc) not in visited:
-                q.append((nr, nc))
-    return False
+    return bfs_shortest_path_length(board, start, goal_rows) is not None
 
 def bfs_shortest_path_length(board: Board, start: Tuple[int,int], goal_rows: List[int]) -> Optional[int]:
-    q = deque([(start, 0)])
-    visited = set()
+    n = board.size
+    steps = board_tables(n).steps
+    blocked = board.edge_blocked
+    i = start[0] * n + start[1]
+    if start[0] in goal_rows:
+        return 0
+    seen = bytearray(n * n)
+    seen[i] = 1
+    frontier = [i]
+    d = 0
+    # one frontier per distance, so the goal test can happen on discovery
+    while frontier:
+        d += 1
+        nxt = []
+        for i in frontier:
+            for j, e in steps[i]:
+                if seen[j] or blocked(e):
+                    continue
+                if j // n in goal_rows:
+                    return d
+                seen[j] = 1
+                nxt.append(j)
+        frontier = nxt
+    return None
+
+UNREACHABLE = -1
+
+
+def distance_map(board: Board, goal_row: int) -> List[int]:
+    """
+    Distance from every cell to goal_row, as a flat list indexed r*size + c
+    (UNREACHABLE where there is no path). One multi-source BFS from the goal
+    row covers the whole board.
+    """
+    n = board.size
+    steps = board_tables(n).steps
+    blocked = board.edge_blocked
+    dist = [UNREACHABLE] * (n * n)
+    q = deque()
+    for c in range(n):
+        dist[goal_row * n + c] = 0
+        q.append(goal_row * n + c)
     while q:
-        (r, c), d = q.popleft()
-        if (r, c) in visited:
-            continue
-        visited.add((r, c))
-        if r in goal_rows:
-            return d
-        for dr, dc in [(1,0),(-1,0),(0,1),(0,-1)]:
-            nr, nc = r+dr, c+dc
-            if not board.inside(nr, nc):
+        i = q.popleft()
+        d = dist[i] + 1
+        for j, e in steps[i]:
+            if dist[j] != UNREACHABLE or blocked(e):
                 continue
-            if board.is_blocked(r, c, nr, nc):
+            dist[j] = d
+            q.append(j)
+    return dist
+
+
+def shortest_path_edges(board: Board, start: Tuple[int,int], goal_row: int,
+                        dist: Optional[List[int]] = None) -> Optional[set]:
+    """
+    Edges of one shortest path from start to goal_row, each as a pair of
+    flat cell indices (low, high); None if the goal is unreachable.
+    A wall that cuts none of them leaves that path, and so a route, intact.
+    """
+    n = board.size
+    if dist is None:
+        dist = distance_map(board, goal_row)
+    steps = board_tables(n).steps
+    blocked = board.edge_blocked
+    i = start[0] * n + start[1]
+    d = dist[i]
+    if d == UNREACHABLE:
+        return None
+    edges = set()
+    while d > 0:
+        for j, e in steps[i]:
+            if dist[j] == d - 1 and not blocked(e):
+                edges.add(e)
+                i, d = j, d - 1
+                break
+    return edges
+
+
+def all_shortest_path_edges(board: Board, start: Tuple[int,int], goal_row: int,
+                            dist: Optional[List[int]] = None) -> Optional[set]:
+    """
+    Like shortest_path_edges(), but the edges of every shortest path from
+    start to goal_row: a wall that lengthens the route must cut one of them.
+    """
+    n = board.size
+    if dist is None:
+        dist = distance_map(board, goal_row)
+    steps = board_tables(n).steps
+    blocked = board.edge_blocked
+    i = start[0] * n + start[1]
+    if dist[i] == UNREACHABLE:
+        return None
+    edges = set()
+    seen = {i}
+    stack = [i]
+    while stack:
+        i = stack.pop()
+        d = dist[i]
+        if d == 0:
+            continue
+        for j, e in steps[i]:
+            if dist[j] != d - 1 or blocked(e):
                 continue
-            if (nr, nc) not in visited:
-                q.append(((nr, nc), d+1))
-    return None
+            edges.add(e)
+            if j not in seen:
+                seen.add(j)
+                stack.append(j)
+    return edges
+
+
+class DistanceMaps:
+    """
+    Cache of distance_map() results keyed by (board.size, board.wall_hash,
+    goal_row). The size is part of the key because wall hashes of different
+    sizes can collide; the empty board hashes to 0 at every size.
+
+    Pawn moves never change a map, so they are always hits. For a new wall
+    layout, pass the most recently placed wall: if the layout without it is
+    cached and the wall cuts no edge that lies on a shortest path (an edge
+    whose ends differ in distance by one), the old map is still exact and
+    is shared. Only otherwise is a BFS run.
+    """
+
+    def __init__(self, max_entries: int = 1 << 16):
+        self.max_entries = max_entries
+        self._maps: dict = {}
+        self.hits = 0
+        self.reused = 0
+        self.rebuilt = 0
+
+    def get(self, board: Board, goal_row: int, last_wall: Optional[Tuple[str, int, int]] = None) -> List[int]:
+        key = (board.size, board.wall_hash, goal_row)
+        dist = self._maps.get(key)
+        if dist is not None:
+            self.hits += 1
+            return dist
+        if last_wall is not None:
+            orient, wr, wc = last_wall
+            z = board._zobrist
+            slot = wr * (board.size - 1) + wc
+            parent_hash = board.wall_hash ^ (z.h[slot] if orient == 'H' else z.v[slot])
+            parent = self._maps.get((board.size, parent_hash, goal_row))
+            if parent is not None and not self._cuts_shortest_path(parent, board.size, orient, wr, wc):
+                self.reused += 1
+                self._put(key, parent)
+                return parent
+        self.rebuilt += 1
+        dist = distance_map(board, goal_row)
+        self._put(key, dist)
+        return dist
+
+    @staticmethod
+    def _cuts_shortest_path(dist: List[int], n: int, orient: str, wr: int, wc: int) -> bool:
+        for r1, c1, r2, c2 in wall_cut_edges(orient, wr, wc):
+            a = dist[r1 * n + c1]
+            b = dist[r2 * n + c2]
+            if a != UNREACHABLE and abs(a - b) == 1:
+                return True
+        return False
+
+    def _put(self, key, dist: List[int]) -> None:
+        if len(self._maps) >= self.max_entries:
+            self._maps.clear()
+        self._maps[key] = dist
+
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'reused': self.reused, 'rebuilt': self.rebuilt}
@@ -0,0 +1,379 @@
+"""
+Game records: a small text notation, streaming reader/writer, and an
+sqlite index over archive files.
+
+A record is a few [Tag "value"] header lines, one line of moves and a
+blank line:
+
+    [Size "9"]
+    [Result "1-0"]
+    [Player1 "Alice"]
+    [Player2 "AI"]
+    e2 e8 e3 e7 d6h e4 ...
+
+Squares are a column letter and a row number counted from player 1's
+side, so player 1 starts on e1 and player 2 on e9 (9x9). A wall is the
+square at its top-left slot plus h or v: ('W', 'H', wr, wc) is written
+letter(wc) + str(wr + 1) + 'h'. Result is "1-0", "0-1" or "*" for a
+game that did not finish.
+
+Archives are plain concatenations of records, so appending a game is a
+single write and the reader can stream files of any size. A record
+only counts once its closing blank line is written, so a game cut off
+mid-write is never read; the next RecordWriter cuts it from the file.
+A GameIndex (sqlite3, next to the archive) maps result, board size and
+opening to byte offsets, so lookups seek straight to the games they
+need:
+
+    python -m game.record index games.qgr
+    python -m game.record find games.qgr --size 9 --result 1-0 --opening "e2 e8 e3"
+"""
+import argparse
+import os
+import re
+import sqlite3
+import sys
+from dataclasses import dataclass, field
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from .board import Board
+from .game_state import Action, GameState
+
+COLUMNS = 'abcdefghijklmnopqrstuvwxyz'
+RESULTS = {0: '1-0', 1: '0-1', None: '*'}
+OPENING_PLIES = 16  # moves of each game kept in the index's opening column
+
+_TAG = re.compile(r'^\[(\w+) "((?:[^"\\]|\\.)*)"\]$')
+_MOVE = re.compile(r'^([a-z])(\d+)([hv]?)$')
+
+
+def format_move(action: Action) -> str:
+    if action[0] == 'M':
+        return f'{COLUMNS[action[2]]}{action[1] + 1}'
+    _, orient, wr, wc = action
+    return f'{COLUMNS[wc]}{wr + 1}{orient.lower()}'
+
+
+def parse_move(text: str) -> Action:
+    m = _MOVE.match(text)
+    if m is None:
+        raise ValueError(f'not a move: {text!r}')
+    col, row, wall = m.groups()
+    r, c = int(row) - 1, COLUMNS.index(col)
+    if wall:
+        return ('W', wall.upper(), r, c)
+    return ('M', r, c)
+
+
+def _opening_key(moves: List[Action]) -> str:
+    # every move followed by a space, so "e2" never prefixes "e2h"
+    return ''.join(format_move(a) + ' ' for a in moves[:OPENING_PLIES])
+
+
+@dataclass
+class GameRecord:
+    size: int
+    moves: List[Action] = field(default_factory=list)
+    result: Optional[int] = None  # winning player index, None if unfinished
+    tags: Dict[str, str] = field(default_factory=dict)  # everything but Size and Result
+
+    @classmethod
+    def from_state(cls, state: GameState, **tags: str) -> 'GameRecord':
+        """The game played so far in state, with the player names as tags."""
+        header = {'Player1': state.players[0].name, 'Player2': state.players[1].name}
+        header.update(tags)
+        return cls(state.board.size, state.moves(), state.winner,
+                   {k: str(v) for k, v in header.items() if v})
+
+    def to_text(self) -> str:
+        lines = [f'[Size "{self.size}"]', f'[Result "{RESULTS[self.result]}"]']
+        for key, value in self.tags.items():
+            value = value.replace('\\', '\\\\').replace('"', '\\"')
+            lines.append(f'[{key} "{value}"]')
+        lines.append(' '.join(format_move(a) for a in self.moves))
+        return '\n'.join(lines) + '\n\n'
+
+    @classmethod
+    def from_text(cls, text: str) -> 'GameRecord':
+        return _parse(text.splitlines())
+
+    def replay(self, board_cls: type = Board) -> GameState:
+        """Play the moves from the start position; ValueError at the first illegal one."""
+        state = GameState(self.size, board_cls=board_cls)
+        for ply, action in enumerate(self.moves):
+            if not state.apply(action):
+                raise ValueError(f'illegal move {format_move(action)} at ply {ply + 1}')
+        return state
+
+
+def _parse(lines: List[str]) -> GameRecord:
+    tags = {}
+    moves: List[Action] = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        m = _TAG.match(line)
+        if m:
+            tags[m.group(1)] = re.sub(r'\\(.)', r'\1', m.group(2))
+        else:
+            moves.extend(parse_move(tok) for tok in line.split())
+    if 'Size' not in tags:
+        raise ValueError('game record without a Size tag')
+    size = int(tags.pop('Size'))
+    result = {v: k for k, v in RESULTS.items()}.get(tags.pop('Result', '*'))
+    return GameRecord(size, moves, result, tags)
+
+
+def scan_records(f: BinaryIO) -> Iterator[Tuple[int, GameRecord]]:
+    """
+    (byte offset, record) for every game from the file's current position
+    on, reading one line at a time. Only blocks closed by a blank line
+    count: a record cut short when the program was killed mid-write may
+    still parse (a header with no moves, half a move line), so a block
+    still open at the end of the file is left out, and blocks that do not
+    parse are skipped.
+    """
+    for start, _, lines in _blocks(f):
+        record = _try_parse(lines)
+        if record is not None:
+            yield start, record
+
+
+def _blocks(f: BinaryIO) -> Iterator[Tuple[int, int, List[str]]]:
+    """(start, end, lines) of each block of non-blank lines closed by a blank one; end is past the blank line."""
+    offset = start = f.tell()
+    lines: List[str] = []
+    for raw in f:
+        offset += len(raw)
+        if raw.strip():
+            if not lines:
+                start = offset - len(raw)
+            lines.append(raw.decode('utf-8', errors='replace'))
+        elif lines:
+            yield start, offset, lines
+            lines = []
+
+
+def _try_parse(lines: List[str]) -> Optional[GameRecord]:
+    try:
+        return _parse(lines)
+    except ValueError:
+        return None
+
+
+def read_records(path: str) -> Iterator[GameRecord]:
+    """Every game in an archive, lazily."""
+    with open(path, 'rb') as f:
+        for _, record in scan_records(f):
+            yield record
+
+
+def read_record_at(path: str, offset: int) -> GameRecord:
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        for _, record in scan_records(f):
+            return record
+    raise ValueError(f'no game at offset {offset} of {path}')
+
+
+class GameIndex:
+    """
+    sqlite3 index of one archive: a row per game with its offset, size,
+    result, length and opening. update() only reads what was appended
+    since the last call.
+    """
+
+    def __init__(self, archive: str, path: Optional[str] = None):
+        self.archive = archive
+        self.path = path or archive + '.idx'
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.db = sqlite3.connect(self.path)
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS games (
+                offset INTEGER PRIMARY KEY,
+                size INTEGER NOT NULL,
+                result INTEGER NOT NULL,  -- winner index, -1 if unfinished
+                plies INTEGER NOT NULL,
+                opening TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS games_size ON games (size, result);
+            CREATE INDEX IF NOT EXISTS games_result ON games (result);
+            CREATE INDEX IF NOT EXISTS games_opening ON games (opening);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER);
+        ''')
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __enter__(self) -> 'GameIndex':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def indexed_bytes(self) -> int:
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'indexed_bytes'").fetchone()
+        return row[0] if row else 0
+
+    def add(self, offset: int, record: GameRecord, end: int) -> None:
+        """Index the game at offset; end is where the archive stops after it."""
+        self._insert(offset, record)
+        self._set_indexed(end)
+        self.db.commit()
+
+    def update(self) -> int:
+        """Index the games appended to the archive since last time; returns how many."""
+        if not os.path.exists(self.archive):
+            return 0
+        added = 0
+        with open(self.archive, 'rb') as f:
+            f.seek(self.indexed_bytes)
+            end = f.tell()
+            # stop after the last closed block, so a record still being
+            # written is indexed once it is finished
+            for offset, end, lines in _blocks(f):
+                record = _try_parse(lines)
+                if record is not None:
+                    self._insert(offset, record)
+                    added += 1
+            self._set_indexed(end)
+        self.db.commit()
+        return added
+
+    def find(self, size: Optional[int] = None, result: Optional[str] = None,
+             opening: Optional[List[Action]] = None, limit: Optional[int] = None) -> List[int]:
+        """
+        Offsets of the games matching every given filter, in archive order.
+        result is "1-0", "0-1" or "*"; opening a list of first moves, matched
+        on its first OPENING_PLIES moves.
+        """
+        where, args = [], []
+        if size is not None:
+            where.append('size = ?')
+            args.append(size)
+        if result is not None:
+            winner = {v: k for k, v in RESULTS.items()}[result]
+            where.append('result = ?')
+            args.append(-1 if winner is None else winner)
+        if opening:
+            prefix = _opening_key(opening)
+            # a range, so the opening index serves the prefix match
+            where.append('opening >= ? AND opening < ?')
+            args += [prefix, prefix + '\x7f']
+        sql = 'SELECT offset FROM games'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += ' ORDER BY offset'
+        if limit is not None:
+            sql += f' LIMIT {int(limit)}'
+        return [row[0] for row in self.db.execute(sql, args)]
+
+    def games(self, **filters) -> Iterator[GameRecord]:
+        """The records find(**filters) points at, read by seeking into the archive."""
+        with open(self.archive, 'rb') as f:
+            for offset in self.find(**filters):
+                f.seek(offset)
+                for _, record in scan_records(f):
+                    yield record
+                    break
+
+    def counts(self) -> Dict[Tuple[int, str], int]:
+        """Number of games per (size, result)."""
+        rows = self.db.execute('SELECT size, result, COUNT(*) FROM games GROUP BY size, result')
+        return {(size, RESULTS[None if r < 0 else r]): n for size, r, n in rows}
+
+    def _insert(self, offset: int, record: GameRecord) -> None:
+        result = -1 if record.result is None else record.result
+        self.db.execute('INSERT OR REPLACE INTO games VALUES (?, ?, ?, ?, ?)',
+                        (offset, record.size, result, len(record.moves), _opening_key(record.moves)))
+
+    def _set_indexed(self, end: int) -> None:
+        self.db.execute("INSERT OR REPLACE INTO meta VALUES ('indexed_bytes', ?)", (end,))
+
+
+class RecordWriter:
+    """
+    Appends finished games to an archive, keeping its index (if given)
+    up to date. Usable as a context manager.
+    """
+
+    def __init__(self, path: str, index: Optional[GameIndex] = None):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.index = index
+        if index is not None:
+            index.update()  # catch up on games written without it
+        self._f = open(path, 'ab')
+        self._drop_unfinished_record()
+
+    def _drop_unfinished_record(self) -> None:
+        # a record cut short has no closing blank line. Closing it would make
+        # the reader take it for a whole (shorter) game, and leaving it open
+        # would glue the next record onto it, so cut the file back to the
+        # end of the last complete record instead
+        size = self._f.tell()
+        if self.index is not None:
+            end = self.index.indexed_bytes  # update() stops at that point
+        else:
+            end = 0
+            with open(self.path, 'rb') as f:
+                for _, end, _ in _blocks(f):
+                    pass
+        if end < size:
+            self._f.truncate(end)
+            self._f.seek(end)
+
+    def write(self, record: GameRecord) -> int:
+        """Append record and return its byte offset."""
+        offset = self._f.tell()
+        self._f.write(record.to_text().encode('utf-8'))
+        self._f.flush()
+        if self.index is not None:
+            self.index.add(offset, record, self._f.tell())
+        return offset
+
+    def close(self) -> None:
+        self._f.close()
+        if self.index is not None:
+            self.index.close()
+
+    def __enter__(self) -> 'RecordWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Index and search Quoridor game archives.')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('index', help='index the games appended since the last run')
+    p.add_argument('archive')
+    p = sub.add_parser('find', help='list games by size, result and opening')
+    p.add_argument('archive')
+    p.add_argument('--size', type=int, default=None)
+    p.add_argument('--result', choices=sorted(RESULTS.values()), default=None)
+    p.add_argument('--opening', default=None, help='first moves, e.g. "e2 e8 e3"')
+    p.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    with GameIndex(args.archive) as index:
+        added = index.update()
+        if args.command == 'index':
+            print(f'{added} new games indexed')
+            for (size, result), n in sorted(index.counts().items()):
+                print(f'  {size}x{size} {result}: {n}')
+            return 0
+        opening = [parse_move(t) for t in args.opening.split()] if args.opening else None
+        for record in index.games(size=args.size, result=args.result, opening=opening, limit=args.limit):
+            tags = ' '.join(f'{k}={v}' for k, v in record.tags.items())
+            print(f'{record.size}x{record.size} {RESULTS[record.result]} {len(record.moves)} plies  {tags}')
+            print('   ', ' '.join(format_move(a) for a in record.moves[:OPENING_PLIES]))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,38 +1,62 @@
-from typing import List, Tuple
+from typing import Dict, FrozenSet, List, Tuple
 from .board import Board
 from .player import Player
+from .tables import board_tables
+
+MOVE_CACHE_SIZE = 1 << 16
+# (size, wall hash, mover's cell, opponent's cell) -> (moves in generation order, same as a set)
+_MOVE_CACHE: Dict[Tuple[int, int, int, int], Tuple[Tuple[Tuple[int, int], ...], FrozenSet[Tuple[int, int]]]] = {}
 
 def legal_moves(board: Board, players: List[Player], player_index: int) -> List[Tuple[int,int]]:
 
     p = players[player_index]
     opp = players[1 - player_index]
-    r, c = p.r, p.c
+    n = board.size
+    tables = board_tables(n)
+    steps, coords = tables.steps, tables.coords
+    blocked = board.edge_blocked
+    me = p.r * n + p.c
+    them = opp.r * n + opp.c
     moves = []
-    for dr, dc in [(1,0),(-1,0),(0,1),(0,-1)]:
-        nr, nc = r+dr, c+dc
-        if not board.inside(nr, nc):
-            continue
-        if board.is_blocked(r, c, nr, nc):
+    for j, e in steps[me]:
+        if blocked(e):
             continue
         # neighbor occupied by opponent?
-        if (nr, nc) == (opp.r, opp.c):
-            # attempt to jump straight
-            jr, jc = nr+dr, nc+dc
-            if board.inside(jr, jc) and not board.is_blocked(nr, nc, jr, jc):
-                moves.append((jr, jc))
+        if j == them:
+            # attempt to jump straight; 2j - me is only a step from j if it continues the line
+            straight = 2 * j - me
+            for k, e2 in steps[j]:
+                if k == straight:
+                    break
+            else:
+                k = -1
+            if k >= 0 and not blocked(e2):
+                moves.append(coords[k])
             else:
                 # add reachable diagonals around opponent
-                for odr, odc in [(0,1),(0,-1),(1,0),(-1,0)]:
-                    if (odr, odc) == (dr, dc) or (odr, odc) == (-dr, -dc):
-                        continue
-                    ar, ac = nr+odr, nc+odc
-                    if board.inside(ar, ac) and not board.is_blocked(nr, nc, ar, ac):
-                        moves.append((ar, ac))
+                for k, e2 in steps[j]:
+                    if k != me and k != straight and not blocked(e2):
+                        moves.append(coords[k])
         else:
-            moves.append((nr, nc))
-    # deduplicate
-    uniq = []
-    for m in moves:
-        if m not in uniq:
-            uniq.append(m)
-    return uniq
+            moves.append(coords[j])
+    # no duplicates to remove: steps reach distinct neighbours, and the
+    # jumps (all around the one neighbour holding the opponent) are two steps away
+    return moves
+
+def cached_legal_moves(board: Board, players: List[Player],
+                       player_index: int) -> Tuple[Tuple[Tuple[int, int], ...], FrozenSet[Tuple[int, int]]]:
+    """
+    legal_moves() as an immutable (ordered tuple, frozenset) pair, shared by
+    every position with the same walls and pawns, whatever the board class.
+    """
+    n = board.size
+    p = players[player_index]
+    opp = players[1 - player_index]
+    key = (n, board.wall_hash, p.r * n + p.c, opp.r * n + opp.c)
+    entry = _MOVE_CACHE.get(key)
+    if entry is None:
+        moves = tuple(legal_moves(board, players, player_index))
+        if len(_MOVE_CACHE) >= MOVE_CACHE_SIZE:
+            _MOVE_CACHE.clear()
+        entry = _MOVE_CACHE[key] = (moves, frozenset(moves))
+    return entry
@@ -0,0 +1,73 @@
+"""
+Per-size lookup tables for the board geometry, built once per board size
+and shared by every board, rules and pathfinding call of that size.
+
+Cells are flat indices r*size + c. An edge between two adjacent cells is
+the pair (low, high) of their indices, as in shortest_path_edges().
+"""
+from typing import Dict, List, Tuple
+
+# step order used everywhere: down, up, right, left
+DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+
+def wall_cut_edges(orientation: str, wr: int, wc: int) -> List[Tuple[int, int, int, int]]:
+    """The two cell edges (r1, c1, r2, c2) a wall at (wr, wc) cuts."""
+    if orientation == 'H':
+        return [(wr, wc, wr + 1, wc), (wr, wc + 1, wr + 1, wc + 1)]
+    return [(wr, wc, wr, wc + 1), (wr + 1, wc, wr + 1, wc + 1)]
+
+
+class BoardTables:
+    """
+    Geometry of one board size.
+
+    coords[cell]             (r, c) of a flat cell
+    steps[cell]              (neighbour, edge) for each on-board step, in DIRECTIONS order
+    edges[(orient, wr, wc)]  the two edges that wall cuts
+    walls[edge]              every wall slot that cuts that edge (one or two)
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        n = size
+        self.coords: List[Tuple[int, int]] = [divmod(i, n) for i in range(n * n)]
+        self.steps: List[Tuple[Tuple[int, Tuple[int, int]], ...]] = []
+        for r in range(n):
+            for c in range(n):
+                i = r * n + c
+                row = []
+                for dr, dc in DIRECTIONS:
+                    nr, nc = r + dr, c + dc
+                    if 0 <= nr < n and 0 <= nc < n:
+                        j = nr * n + nc
+                        row.append((j, (i, j) if i < j else (j, i)))
+                self.steps.append(tuple(row))
+
+        self.edges: Dict[Tuple[str, int, int], Tuple[Tuple[int, int], Tuple[int, int]]] = {}
+        self.walls: Dict[Tuple[int, int], List[Tuple[str, int, int]]] = {}
+        for wr in range(n - 1):
+            for wc in range(n - 1):
+                for orient in ('H', 'V'):
+                    wall = (orient, wr, wc)
+                    cut = tuple((r1 * n + c1, r2 * n + c2)
+                                for r1, c1, r2, c2 in wall_cut_edges(orient, wr, wc))
+                    self.edges[wall] = cut
+                    for e in cut:
+                        self.walls.setdefault(e, []).append(wall)
+
+    def __deepcopy__(self, memo):
+        return self  # immutable and shared, like the Zobrist tables
+
+    def __reduce__(self):
+        return (board_tables, (self.size,))
+
+
+_TABLES: Dict[int, BoardTables] = {}
+
+
+def board_tables(size: int) -> BoardTables:
+    table = _TABLES.get(size)
+    if table is None:
+        table = _TABLES[size] = BoardTables(size)
+    return table
@@ -0,0 +1,47 @@
+import random
+from typing import Dict
+
+ZOBRIST_SEED = 0x51A1D0  # fixed so keys are stable across runs and processes
+MAX_WALL_COUNT = 64
+
+
+class ZobristTable:
+    """
+    Random 64-bit keys for one board size.
+
+    h[i] / v[i]        horizontal / vertical wall in slot i = wr*(size-1) + wc
+    pawn[p][cell]      player p standing on cell r*size + c
+    walls[p][n]        player p holding n walls
+    side               xor-ed in when player 1 is to move
+
+    Tables are immutable and shared, so copying or pickling a Board keeps
+    pointing at the same instance.
+    """
+
+    def __init__(self, size: int):
+        rnd = random.Random(ZOBRIST_SEED + size)
+        bits = lambda: rnd.getrandbits(64)
+        slots = (size - 1) * (size - 1)
+        cells = size * size
+        self.size = size
+        self.h = [bits() for _ in range(slots)]
+        self.v = [bits() for _ in range(slots)]
+        self.pawn = [[bits() for _ in range(cells)] for _ in range(2)]
+        self.walls = [[bits() for _ in range(MAX_WALL_COUNT + 1)] for _ in range(2)]
+        self.side = bits()
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (zobrist_table, (self.size,))
+
+
+_TABLES: Dict[int, ZobristTable] = {}
+
+
+def zobrist_table(size: int) -> ZobristTable:
+    table = _TABLES.get(size)
+    if table is None:
+        table = _TABLES[size] = ZobristTable(size)
+    return table
@@ -0,0 +1,38 @@
+import os
+import random
+import sys
+
+import pytest
+
+# the game and ai packages live in the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game.game_state import GameState  # noqa: E402
+
+
+def random_position(seed: int, size: int = 9, plies: int = 20, board_cls=None,
+                    wall_prob: float = 0.35) -> GameState:
+    """
+    A seeded random game of up to plies moves, about wall_prob of them
+    walls, stopped before anyone steps onto their goal row.
+    """
+    rnd = random.Random(seed)
+    state = GameState(size) if board_cls is None else GameState(size, board_cls=board_cls)
+    for _ in range(plies):
+        pi = state.current
+        if rnd.random() < wall_prob and state.players[pi].walls > 0:
+            wall = (rnd.choice('HV'), rnd.randrange(size - 1), rnd.randrange(size - 1))
+            if state.try_place_wall(pi, *wall):
+                continue
+        goal = size - 1 if pi == 0 else 0
+        moves = sorted(m for m in state.legal_moves(pi) if m[0] != goal)
+        if not moves:
+            break
+        state.move_pawn(pi, *rnd.choice(moves))
+    return state
+
+
+@pytest.fixture
+def random_game():
+    """random_game(seed, size=9, plies=20, board_cls=None) -> GameState"""
+    return random_position
@@ -0,0 +1,98 @@
+from collections import deque
+
+import pytest
+
+from game.board import Board
+from game.bitboard import BitBoard
+from game.game_state import GameState
+
+SIZES = (5, 9, 13)
+
+
+def reaches(board, start, goal_row):
+    """Plain BFS over is_blocked, independent of the table-driven pathfinding."""
+    n = board.size
+    seen = {start}
+    queue = deque([start])
+    while queue:
+        r, c = queue.popleft()
+        if r == goal_row:
+            return True
+        for nr, nc in ((r + 1, c), (r - 1, c), (r, c + 1), (r, c - 1)):
+            if 0 <= nr < n and 0 <= nc < n and (nr, nc) not in seen and not board.is_blocked(r, c, nr, nc):
+                seen.add((nr, nc))
+                queue.append((nr, nc))
+    return False
+
+
+def brute_force_walls(state):
+    """Every wall slot that is free and leaves both pawns a way to their goal."""
+    board = state.board
+    n = board.size
+    legal = []
+    for wr in range(n - 1):
+        for wc in range(n - 1):
+            for orient in ('H', 'V'):
+                if not state.can_place_wall(orient, wr, wc):
+                    continue
+                place, remove = ((board.place_horizontal, board.remove_horizontal) if orient == 'H'
+                                 else (board.place_vertical, board.remove_vertical))
+                place(wr, wc)
+                p0, p1 = state.players
+                if reaches(board, (p0.r, p0.c), n - 1) and reaches(board, (p1.r, p1.c), 0):
+                    legal.append((orient, wr, wc))
+                remove(wr, wc)
+    return legal
+
+
+@pytest.mark.parametrize('size', SIZES)
+@pytest.mark.parametrize('seed', range(6))
+def test_board_classes_agree(random_game, size, seed):
+    plain = random_game(seed, size, plies=30)
+    bits = random_game(seed, size, plies=30, board_cls=BitBoard)
+    assert plain.board.h_walls == bits.board.h_walls
+    assert plain.board.v_walls == bits.board.v_walls
+    assert plain.board.wall_hash == bits.board.wall_hash
+    for r1 in range(-1, size + 1):
+        for c1 in range(-1, size + 1):
+            for r2, c2 in ((r1 + 1, c1), (r1 - 1, c1), (r1, c1 + 1), (r1, c1 - 1), (r1 + 1, c1 + 1)):
+                assert plain.board.is_blocked(r1, c1, r2, c2) == bits.board.is_blocked(r1, c1, r2, c2)
+    for pi in (0, 1):
+        assert list(plain.legal_moves(pi)) == list(bits.legal_moves(pi))
+    assert plain.legal_walls() == bits.legal_walls()
+
+
+@pytest.mark.parametrize('board_cls', (Board, BitBoard))
+@pytest.mark.parametrize('size', SIZES)
+@pytest.mark.parametrize('seed', range(4))
+def test_legal_walls_matches_path_search(random_game, board_cls, size, seed):
+    state = random_game(seed, size, plies=40, board_cls=board_cls)
+    assert sorted(state.legal_walls()) == sorted(brute_force_walls(state))
+
+
+def test_jump_and_side_steps():
+    state = GameState(9)
+    p0, p1 = state.players
+    p0.r, p0.c = 4, 4
+    p1.r, p1.c = 5, 4
+    assert set(state.legal_moves(0)) == {(3, 4), (4, 3), (4, 5), (6, 4)}
+    # a wall behind the opponent turns the straight jump into the two diagonal ones
+    state.board.place_horizontal(5, 4)
+    state.board.place_horizontal(5, 2)
+    assert set(state.legal_moves(0)) == {(3, 4), (4, 3), (4, 5), (5, 3), (5, 5)}
+    assert state.is_legal_pawn_move(5, 5)
+    assert not state.is_legal_pawn_move(6, 4)
+
+
+def test_assigning_bitboard_walls_updates_hash_and_moves():
+    state = GameState(9, board_cls=BitBoard)
+    assert state.is_legal_pawn_move(1, 4)
+    grid = state.board.h_walls
+    grid[0][3] = True
+    state.board.h_walls = grid
+
+    placed = BitBoard(9)
+    placed.place_horizontal(0, 3)
+    assert state.board.wall_hash == placed.wall_hash
+    assert state.board.is_blocked(0, 4, 1, 4)
+    assert not state.is_legal_pawn_move(1, 4)
@@ -0,0 +1,53 @@
+import pytest
+
+from ai.ai import MinimaxAI
+from ai.book import OpeningBook, decode_move, encode_move, write_book
+from game.game_state import GameState
+
+
+@pytest.fixture
+def book(tmp_path):
+    start = GameState(9)
+    after = start.clone()
+    after.apply(('M', 1, 4))
+    path = str(tmp_path / 'book_9.bin')
+    write_book(path, 9, {
+        start.zobrist_key(): (('M', 1, 4), 4, 10),
+        after.zobrist_key(): (('W', 'H', 6, 3), 4, 3),
+    })
+    book = OpeningBook(path)
+    yield book
+    book.close()
+
+
+def test_move_codes():
+    for action in (('M', 0, 0), ('M', 12, 7), ('W', 'H', 2, 3), ('W', 'V', 11, 0)):
+        assert decode_move(encode_move(action)) == action
+
+
+def test_lookup(book):
+    state = GameState(9)
+    assert len(book) == 2
+    assert book.lookup(state) == ('M', 1, 4)
+    state.apply(('M', 1, 4))
+    assert book.lookup(state) == ('W', 'H', 6, 3)
+    state.apply(('W', 'H', 6, 3))
+    assert book.lookup(state) is None
+    assert book.lookup(GameState(5)) is None
+    assert book.hits == 2
+
+
+def test_illegal_book_move_is_ignored(tmp_path):
+    path = str(tmp_path / 'bad.bin')
+    write_book(path, 9, {GameState(9).zobrist_key(): (('M', 5, 5), 4, 1)})
+    book = OpeningBook(path)
+    try:
+        assert book.lookup(GameState(9)) is None
+    finally:
+        book.close()
+
+
+def test_book_move_is_played_without_search(book):
+    ai = MinimaxAI(max_depth=2, book=book)
+    assert ai.choose_move(GameState(9), 0) == ('M', 1, 4)
+    assert ai.nodes == 0
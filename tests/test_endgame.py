@@ -0,0 +1,137 @@
+import pytest
+
+from ai import endgame
+from ai.endgame import DRAW, LOSS, WIN, EndgameSolver, RaceTable
+from game.board import Board
+from game.player import Player
+from game.rules import legal_moves
+
+
+def brute_force(board):
+    """
+    (outcome, plies) of every no-walls position, by repeating a one-ply
+    look-ahead over rules.legal_moves until nothing changes: a position is
+    won in d plies if some move reaches one lost in d - 1, lost in d if
+    every move reaches one won in fewer. A pawn boxed in with no move at
+    all is never decided, i.e. a draw, as in the table.
+    """
+    n = board.size
+    cells = [(r, c) for r in range(n) for c in range(n)]
+    succ = {}
+    for a in cells:
+        for b in cells:
+            if a == b:
+                continue
+            players = [Player(*a, walls=0), Player(*b, walls=0)]
+            succ[a, b, 0] = [(m, b, 1) for m in legal_moves(board, players, 0)]
+            succ[a, b, 1] = [(a, m, 0) for m in legal_moves(board, players, 1)]
+    known = {s: (LOSS, 0) for s in succ if s[0][0] == n - 1 or s[1][0] == 0}
+    d = 0
+    while True:
+        d += 1
+        new = {}
+        for s, moves in succ.items():
+            if s in known:
+                continue
+            results = [known.get(t) for t in moves]
+            if any(res is not None and res[0] == LOSS for res in results):
+                new[s] = (WIN, d)
+            elif results and all(res is not None and res[0] == WIN for res in results):
+                new[s] = (LOSS, d)
+        if not new:
+            return {s: known.get(s, (DRAW, 0)) for s in succ}
+        known.update(new)
+
+
+# 5x5 wall layouts from open to mazy; the last boxes a pawn in at a1
+LAYOUTS = [
+    [],
+    [('H', 1, 0), ('H', 1, 2)],
+    [('H', 0, 1), ('V', 1, 2), ('H', 2, 0), ('V', 3, 3)],
+    [('H', 1, 0), ('H', 1, 2), ('V', 2, 3), ('H', 3, 1), ('V', 0, 0)],
+]
+
+
+@pytest.mark.parametrize('walls', LAYOUTS)
+def test_race_table_matches_brute_force(walls):
+    board = Board(5)
+    for orient, wr, wc in walls:
+        (board.place_horizontal if orient == 'H' else board.place_vertical)(wr, wc)
+    table = RaceTable(board)
+    expected = brute_force(board)
+    for ((r0, c0), (r1, c1), side), (outcome, plies) in expected.items():
+        got = table.result(r0 * 5 + c0, r1 * 5 + c1, side)
+        if outcome == DRAW:
+            assert got[0] == DRAW
+        else:
+            assert got == (outcome, plies)
+
+
+def test_solver_cache_is_bounded():
+    solver = EndgameSolver(max_states=3 * 2 * 5 ** 4)
+    for wc in range(4):
+        board = Board(5)
+        board.place_vertical(0, wc)
+        solver.table(board)
+        assert solver._states <= solver.max_states
+    assert len(solver._tables) <= 3
+
+
+def test_solver_keeps_board_sizes_apart():
+    solver = EndgameSolver()
+    for size in (5, 9, 5):
+        table = solver.table(Board(size))
+        assert table.size == size
+    assert len(solver._tables) == 2
+
+
+def few_walls(state, holder, walls=1):
+    state.players[holder].walls = walls
+    state.players[1 - holder].walls = 0
+    return state
+
+
+def test_proof_finds_winning_last_walls(random_game):
+    found = 0
+    for seed in range(40):
+        state = random_game(seed, 5, plies=10)
+        if state.winner is not None:
+            continue
+        few_walls(state, state.current)
+        solver = EndgameSolver()
+        if solver.table(state.board).state_result(state)[0] == WIN:
+            continue  # won without walls, no proof needed
+        move = solver.solve(state)
+        if move is None or move[0] != 'W':
+            continue
+        state.apply(move)
+        assert RaceTable(state.board).state_result(state)[0] == LOSS
+        found += 1
+    assert found >= 3
+
+
+def test_proofs_are_only_run_for_the_wall_holder(random_game):
+    state = few_walls(random_game(1, 9, plies=10), 0, walls=2)
+    state.current = 1
+    solver = EndgameSolver()
+    assert solver.applies(state)
+    assert solver.solve(state) is None
+    assert not solver._tables  # gave up before building anything
+    assert not EndgameSolver(proofs=False).applies(state)
+    state.players[0].walls = 0
+    assert EndgameSolver(proofs=False).applies(state)
+
+
+def test_unfinished_proofs_are_not_retried(monkeypatch, random_game):
+    solver = EndgameSolver()
+    for seed in range(20):
+        state = few_walls(random_game(seed, 9, plies=10), 0)
+        state.current = 0
+        if state.winner is None and solver.table(state.board).state_result(state)[0] != WIN:
+            break
+    monkeypatch.setattr(endgame, 'PROOF_BUDGET', 0)
+    assert solver.solve(state) is None
+    assert state.zobrist_key() in solver._unproven
+    monkeypatch.setattr(endgame, 'PROOF_BUDGET', 10 ** 6)
+    monkeypatch.setattr(solver, '_moves', None)  # a retry would call it
+    assert solver.solve(state) is None
@@ -0,0 +1,99 @@
+import random
+
+import pytest
+
+from game.board import Board
+from game.bitboard import BitBoard
+from game.game_state import GameState
+
+
+def test_apply_and_undo_last_restore_the_position(random_game):
+    state = random_game(3, 9, plies=10)
+    before = state.serialize()
+    key = state.zobrist_key()
+    rnd = random.Random(3)
+    played = 0
+    for _ in range(30):
+        if state.winner is not None:
+            break
+        if rnd.random() < 0.3:
+            action = ('W', rnd.choice('HV'), rnd.randrange(8), rnd.randrange(8))
+        else:
+            action = ('M',) + rnd.choice(sorted(state.legal_moves(state.current)))
+        if state.apply(action):
+            played += 1
+    for _ in range(played):
+        assert state.undo_last()
+    assert state.serialize() == before
+    assert state.zobrist_key() == key
+
+
+def test_undo_and_rewind_follow_the_move_log(random_game):
+    state = random_game(3, 9, plies=30)
+    moves = state.moves()
+    keys = []
+    replay = GameState(9)
+    for action in moves:
+        keys.append(replay.zobrist_key())
+        assert replay.apply(action)
+    assert replay.serialize() == state.serialize()
+    for ply in reversed(range(len(moves))):
+        state.undo_last()
+        assert state.zobrist_key() == keys[ply]
+    assert state.serialize() == GameState(9).serialize()
+    replay.rewind(5)
+    assert replay.moves() == moves[:5]
+
+
+@pytest.mark.parametrize('board_cls', (Board, BitBoard))
+@pytest.mark.parametrize('size', (5, 9, 13))
+@pytest.mark.parametrize('seed', range(5))
+def test_bytes_round_trip(random_game, board_cls, size, seed):
+    state = random_game(seed, size, plies=25, board_cls=board_cls)
+    data = state.to_bytes()
+    for target in (Board, BitBoard):
+        copy = GameState.from_bytes(data, board_cls=target)
+        assert copy.to_bytes() == data
+        assert copy.zobrist_key() == state.zobrist_key()
+        assert copy.stable_hash() == state.stable_hash()
+        assert copy.board.wall_hash == state.board.wall_hash
+        assert [(p.r, p.c, p.walls) for p in copy.players] == [(p.r, p.c, p.walls) for p in state.players]
+        assert (copy.current, copy.winner) == (state.current, state.winner)
+
+
+def test_encoded_sizes():
+    assert len(GameState(9).to_bytes()) == 24
+    assert len(GameState(13).to_bytes()) == 44
+
+
+def test_winner_round_trip():
+    state = GameState(9)
+    state.winner = 1
+    assert GameState.from_bytes(state.to_bytes()).winner == 1
+
+
+@pytest.mark.parametrize('cut', (0, 1, 7, 8, 23))
+def test_from_bytes_rejects_truncated_data(cut):
+    with pytest.raises(ValueError):
+        GameState.from_bytes(GameState(9).to_bytes()[:cut])
+
+
+def corrupt(offset, value, size=9):
+    data = bytearray(GameState(size).to_bytes())
+    data[offset] = value
+    return bytes(data)
+
+
+@pytest.mark.parametrize('data', [
+    corrupt(0, 0),              # board size
+    corrupt(0, 5),              # a size that does not match the length
+    corrupt(1, 0x08),           # unknown flag bit
+    corrupt(1, 0x06),           # winner 2
+    corrupt(2, 9),              # pawn row off the board
+    corrupt(5, 0),              # player 1 on player 0's cell
+    corrupt(4, 11),             # too many walls in hand
+    corrupt(-1, 0x80, size=7),  # wall bit past the last slot
+])
+def test_from_bytes_rejects_corrupt_data(data):
+    with pytest.raises(ValueError):
+        GameState.from_bytes(data)
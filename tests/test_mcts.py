@@ -0,0 +1,58 @@
+import threading
+
+from ai.mcts import MCTSAI
+from game.game_state import GameState
+
+
+def test_returns_a_legal_move(random_game):
+    for seed in range(3):
+        state = random_game(seed, 9, plies=16)
+        move = MCTSAI(iterations=200, seed=seed).choose_move(state, state.current)
+        assert state.clone().apply(move)
+
+
+def test_one_ai_plays_on_several_board_sizes():
+    ai = MCTSAI(iterations=100, seed=0)
+    for size in (5, 9, 5):
+        state = GameState(size)
+        assert state.clone().apply(ai.choose_move(state, state.current))
+
+
+def test_takes_an_immediate_win():
+    state = GameState(9)
+    state.players[0].r, state.players[0].c = 7, 2
+    assert MCTSAI(iterations=300, seed=0).choose_move(state, 0) == ('M', 8, 2)
+
+
+def test_seeded_searches_repeat(random_game):
+    state = random_game(4, 9, plies=16)
+    first = MCTSAI(iterations=300, seed=7)
+    second = MCTSAI(iterations=300, seed=7)
+    assert first.choose_move(state, state.current) == second.choose_move(state, state.current)
+    assert first.last_pv == second.last_pv
+
+
+def test_tree_is_kept_for_the_next_turn(random_game):
+    state = random_game(4, 9, plies=16)
+    ai = MCTSAI(iterations=300, seed=1)
+    ai.choose_move(state, state.current)
+    for action in ai.last_pv[:2]:
+        state.apply(action)
+    ai.choose_move(state, state.current)
+    assert ai.reused_visits > 0
+
+
+def test_ponder_grows_the_tree_of_the_reply(random_game):
+    state = random_game(4, 9, plies=16)
+    ai = MCTSAI(iterations=100, seed=1)
+    state.apply(ai.choose_move(state, state.current))
+    stop = threading.Event()
+    timer = threading.Timer(0.3, stop.set)
+    timer.start()
+    ai.ponder(state, stop)
+    timer.join()
+    reply = max(ai._root.children, key=lambda ch: ch.visits)
+    pondered = reply.visits
+    state.apply(reply.move)
+    ai.choose_move(state, state.current)
+    assert ai.reused_visits == pondered > 0
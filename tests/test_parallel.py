@@ -0,0 +1,50 @@
+import math
+import multiprocessing
+
+import pytest
+
+from ai import parallel
+from ai.ai import MinimaxAI
+from ai.mcts import MCTSAI
+
+
+@pytest.mark.parametrize('size', (5, 9))
+def test_parallel_root_search_picks_the_sequential_move(random_game, size):
+    parallel = MinimaxAI(max_depth=2, workers=2)
+    try:
+        for seed in range(4):
+            state = random_game(seed, size, plies=12)
+            expected = MinimaxAI(max_depth=2).choose_move(state, state.current)
+            assert parallel.choose_move(state, state.current) == expected
+    finally:
+        parallel.close()
+
+
+def test_worker_ages_its_tables_once_per_search(monkeypatch, random_game):
+    ai = MinimaxAI(max_depth=2)
+    monkeypatch.setattr(parallel, '_worker_ai', ai)
+    monkeypatch.setattr(parallel, '_worker_scores', [math.nan] * parallel.MAX_ROOT_ACTIONS)
+    monkeypatch.setattr(parallel, '_worker_abort', multiprocessing.Value('b', 0, lock=False))
+    monkeypatch.setattr(parallel, '_worker_search', None)
+    state = random_game(0, 9, plies=12)
+    position = state.to_bytes()
+    actions = ai._generate_actions(state, state.current)[:3]
+    generation = ai.tt.generation
+    for i, action in enumerate(actions):
+        parallel._search_root_action(position, state.current, 2, i, action, None, search_id=1)
+    assert ai.tt.generation == generation + 1
+    parallel._search_root_action(position, state.current, 2, 0, actions[0], None, search_id=2)
+    assert ai.tt.generation == generation + 2
+
+
+def test_parallel_mcts_sums_the_worker_playouts(random_game):
+    state = random_game(1, 9, plies=10)
+    ai = MCTSAI(iterations=100, seed=1, workers=2)
+    try:
+        move = ai.choose_move(state, state.current)
+        assert state.clone().apply(move)
+        stats = ai.parallel_stats()
+        assert stats['iterations'] == 200
+        assert len(stats['workers']) == 2
+    finally:
+        ai.close()
@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+from game.board import Board
+from game.bitboard import BitBoard
+from game.pathfinding import DistanceMaps, distance_map
+
+
+def test_distance_maps_reuse_the_parent_map():
+    board = Board(9)
+    maps = DistanceMaps()
+    empty = maps.get(board, 8)
+    # a vertical wall only cuts sideways steps, which never shorten the way down
+    board.place_vertical(3, 3)
+    assert maps.get(board, 8, ('V', 3, 3)) is empty
+    assert maps.reused == 1
+    board.place_horizontal(5, 2)
+    rebuilt = maps.get(board, 8, ('H', 5, 2))
+    assert rebuilt == distance_map(board, 8)
+    assert rebuilt != empty
+    assert maps.rebuilt == 2
+    assert maps.get(board, 8) is rebuilt
+    assert maps.hits == 1
+
+
+def test_distance_maps_keep_board_sizes_apart():
+    maps = DistanceMaps()
+    small, large = Board(5), Board(9)
+    assert small.wall_hash == large.wall_hash == 0
+    assert maps.get(small, 4) == distance_map(small, 4)
+    assert maps.get(large, 4) == distance_map(large, 4)
+    large.place_vertical(0, 0)
+    assert maps.get(large, 4, ('V', 0, 0)) == distance_map(large, 4)
+
+
+@pytest.mark.parametrize('board_cls', (Board, BitBoard))
+@pytest.mark.parametrize('seed', range(4))
+def test_distance_maps_follow_wall_placements(board_cls, seed):
+    rnd = random.Random(seed)
+    board = board_cls(9)
+    maps = DistanceMaps()
+    for _ in range(30):
+        orient, wr, wc = rnd.choice('HV'), rnd.randrange(8), rnd.randrange(8)
+        if orient == 'H' and board.can_place_horizontal(wr, wc):
+            board.place_horizontal(wr, wc)
+        elif orient == 'V' and board.can_place_vertical(wr, wc):
+            board.place_vertical(wr, wc)
+        else:
+            continue
+        for goal_row in (0, 8):
+            assert maps.get(board, goal_row, (orient, wr, wc)) == distance_map(board, goal_row)
+    assert maps.reused > 0
@@ -0,0 +1,123 @@
+import pytest
+
+from game.game_state import GameState
+from game.record import (GameIndex, GameRecord, RecordWriter, format_move, parse_move,
+                         read_record_at, read_records)
+
+
+def finish(state):
+    """Walk the side to move straight on until someone wins."""
+    while state.winner is None:
+        pi = state.current
+        goal = state.board.size - 1 if pi == 0 else 0
+        moves = sorted(state.legal_moves(pi), key=lambda m: abs(m[0] - goal))
+        state.apply(('M',) + moves[0])
+    return state
+
+
+@pytest.fixture
+def archive(tmp_path, random_game):
+    """An archive of 12 games (some finished) and the records written to it."""
+    path = str(tmp_path / 'games.qgr')
+    records = []
+    with RecordWriter(path, GameIndex(path)) as writer:
+        for seed in range(12):
+            size = 9 if seed % 3 else 5
+            state = random_game(seed, size, plies=20)
+            if seed % 2:
+                finish(state)
+            record = GameRecord.from_state(state, Event=f'game "{seed}"')
+            writer.write(record)
+            records.append(record)
+    return path, records
+
+
+def test_move_notation():
+    for action in (('M', 0, 4), ('M', 12, 0), ('W', 'H', 2, 3), ('W', 'V', 0, 7)):
+        assert parse_move(format_move(action)) == action
+    assert format_move(('M', 1, 4)) == 'e2'
+    assert format_move(('W', 'H', 5, 3)) == 'd6h'
+    with pytest.raises(ValueError):
+        parse_move('e2x')
+
+
+def test_write_read_replay(archive, random_game):
+    path, records = archive
+    read = list(read_records(path))
+    assert read == records
+    for seed, record in enumerate(read):
+        state = record.replay()
+        expected = random_game(seed, record.size, plies=20)
+        if seed % 2:
+            finish(expected)
+        assert state.to_bytes() == expected.to_bytes()
+        assert state.winner == record.result
+
+
+def test_index_find(archive):
+    path, records = archive
+    with GameIndex(path) as index:
+        assert index.update() == 0  # the writer kept it current
+        everything = index.find()
+        assert len(everything) == len(records)
+        assert [read_record_at(path, offset) for offset in everything] == records
+
+        nine = index.find(size=9)
+        assert [read_record_at(path, o).size for o in nine] == [9] * sum(r.size == 9 for r in records)
+        assert len(index.find(result='*')) == sum(r.result is None for r in records)
+        won = index.find(result='1-0') + index.find(result='0-1')
+        assert sorted(won) == sorted(o for o, r in zip(everything, records) if r.result is not None)
+
+        first = records[1]
+        found = list(index.games(opening=first.moves[:3]))
+        assert first in found
+        assert all(r.moves[:3] == first.moves[:3] for r in found)
+        assert len(index.find(limit=2)) == 2
+
+
+def test_truncated_record_is_skipped(archive):
+    path, records = archive
+    with open(path, 'ab') as f:
+        f.write(b'[Size "9"]\n[Res')  # killed mid-write
+    extra = GameRecord.from_state(GameState(9), Event='after')
+    extra.moves = [('M', 1, 4)]
+    with RecordWriter(path, GameIndex(path)) as writer:
+        writer.write(extra)
+    assert list(read_records(path)) == records + [extra]
+    with GameIndex(path) as index:
+        assert len(index.find()) == len(records) + 1
+
+
+@pytest.mark.parametrize('keep', ('header', 'half the moves', 'no blank line'))
+def test_record_cut_mid_write_is_not_read_or_indexed(archive, keep):
+    path, records = archive
+    text = records[1].to_text().encode('utf-8')
+    moves = text.rindex(b']\n') + 2
+    cut = {'header': moves, 'half the moves': (moves + len(text)) // 2,
+           'no blank line': len(text) - 1}[keep]
+    with open(path, 'ab') as f:
+        f.write(text[:cut])  # each of these still parses as a record
+    assert list(read_records(path)) == records
+    with GameIndex(path) as index:
+        assert index.update() == 0
+        assert len(index.find()) == len(records)
+    extra = GameRecord.from_state(GameState(9), Event='after')
+    extra.moves = [('M', 1, 4)]
+    with RecordWriter(path, GameIndex(path)) as writer:
+        writer.write(extra)
+    assert list(read_records(path)) == records + [extra]
+    with GameIndex(path) as index:
+        assert [read_record_at(path, o) for o in index.find()] == records + [extra]
+
+
+def test_index_picks_up_a_record_once_it_is_finished(archive):
+    path, records = archive
+    text = records[1].to_text().encode('utf-8')
+    with GameIndex(path) as index:
+        with open(path, 'ab') as f:
+            f.write(text[:-1])
+        assert index.update() == 0
+        with open(path, 'ab') as f:
+            f.write(text[-1:])
+        assert index.update() == 1
+        assert read_record_at(path, index.find()[-1]) == records[1]
@@ -0,0 +1,100 @@
+import threading
+from math import inf
+
+import pytest
+
+from ai.ai import WIN_SCORE, MinimaxAI
+from game.game_state import GameState
+
+
+def minimax(ai, state, depth):
+    """Plain negamax without pruning, tables or ordering: the reference value."""
+    winner = state.get_winner()
+    if winner is not None:
+        return WIN_SCORE if winner == state.current else -WIN_SCORE
+    if depth == 0:
+        return ai._evaluate(state, state.current)
+    best = -inf
+    for action in ai._generate_actions(state, state.current):
+        state.apply(action, checked=True)
+        best = max(best, -minimax(ai, state, depth - 1))
+        state.undo_last()
+    return best
+
+
+def root_scores(ai, state, depth):
+    scores = {}
+    for action in ai._generate_actions(state, state.current):
+        state.apply(action, checked=True)
+        scores[action] = -minimax(ai, state, depth - 1)
+        state.undo_last()
+    return scores
+
+
+@pytest.mark.parametrize('size, depth, seeds', [(5, 3, range(8)), (9, 2, range(6))])
+def test_search_matches_plain_minimax(random_game, size, depth, seeds):
+    for seed in seeds:
+        state = random_game(seed, size, plies=12)
+        ai = MinimaxAI(max_depth=depth, endgame=False)
+        scores = root_scores(MinimaxAI(endgame=False), state.clone(), depth)
+        best = max(scores.values())
+        # twice: the second search starts with the first one's table
+        for _ in range(2):
+            move = ai.choose_move(state, state.current)
+            assert ai.last_score == best
+            assert scores[move] == best
+
+
+def test_iterative_deepening_reaches_the_same_score(random_game):
+    state = random_game(2, 9, plies=12)
+    fixed = MinimaxAI(max_depth=2, endgame=False)
+    fixed.choose_move(state, state.current)
+    timed = MinimaxAI(max_depth=2, time_limit_ms=60_000, endgame=False)
+    move = timed.choose_move(state, state.current)
+    assert timed.last_depth == 2
+    assert timed.last_score == fixed.last_score
+    assert timed.last_pv[0] == move
+
+
+@pytest.mark.parametrize('workers', (1, 2))
+def test_one_ai_plays_on_several_board_sizes(workers):
+    ai = MinimaxAI(max_depth=2, workers=workers)
+    try:
+        for size in (5, 9, 5):
+            state = GameState(size)
+            assert state.clone().apply(ai.choose_move(state, state.current))
+    finally:
+        ai.close()
+
+
+def test_tiny_time_budget_still_returns_a_legal_move(random_game):
+    state = random_game(2, 9, plies=12)
+    ai = MinimaxAI(max_depth=8, time_limit_ms=1)
+    move = ai.choose_move(state, state.current)
+    assert state.clone().apply(move)
+
+
+def test_stats_leave_the_search_unchanged(random_game):
+    state = random_game(4, 9, plies=12)
+    expected = MinimaxAI(max_depth=2).choose_move(state, state.current)
+    counted = MinimaxAI(max_depth=2, stats=True)
+    assert counted.choose_move(state, state.current) == expected
+    stats = counted.stats
+    assert stats.depth == 2
+    assert stats.expanded > 0 and sum(stats.nodes_by_ply) > stats.expanded
+    assert stats.phase_calls['evaluate'] > 0
+    counted.disable_stats()
+    assert counted.stats is None
+    assert counted.choose_move(state, state.current) == expected
+
+
+def test_ponder_hit_answers_from_the_pondered_search(random_game):
+    state = random_game(5, 9, plies=10)
+    ai = MinimaxAI(max_depth=2)
+    state.apply(ai.choose_move(state, state.current))
+    predicted = ai.last_pv[1]
+    ai.ponder(state, threading.Event())
+    state.apply(predicted)
+    expected = MinimaxAI(max_depth=2).choose_move(state, state.current)
+    assert ai.choose_move(state, state.current) == expected
+    assert ai.ponder_hits == 1
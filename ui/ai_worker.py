@@ -0,0 +1,58 @@
+import threading
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+
+class AIWorker(QThread):
+    """
+    Runs ai.choose_move on a snapshot of the game in a background thread
+    so the window keeps repainting and taking input while the AI thinks.
+
+    moveReady is emitted with the chosen action (or None) unless the
+    search was cancelled; Qt queues it back onto the GUI thread.
+    """
+    moveReady = pyqtSignal(object)
+
+    def __init__(self, ai, game_state, player_index, parent=None):
+        super().__init__(parent)
+        self.ai = ai
+        # the GUI keeps mutating the real GameState, so search a private copy
+        self.snapshot = game_state.clone()
+        self.player_index = player_index
+        self._stop = threading.Event()
+
+    def run(self):
+        move = self.ai.choose_move(self.snapshot, self.player_index, stop_event=self._stop)
+        if not self._stop.is_set():
+            self.moveReady.emit(move)
+
+    def cancel(self):
+        """Stop the search and block until the thread has exited."""
+        self._stop.set()
+        try:
+            self.moveReady.disconnect()
+        except TypeError:
+            pass  # nothing connected
+        self.wait()
+
+
+class PonderWorker(QThread):
+    """
+    Runs ai.ponder on a snapshot of the game while the human is to move,
+    so the AI keeps thinking on their time. The search checks its stop
+    flag at every node, so stop() returns almost at once.
+    """
+
+    def __init__(self, ai, game_state, parent=None):
+        super().__init__(parent)
+        self.ai = ai
+        self.snapshot = game_state.clone()
+        self._stop = threading.Event()
+
+    def run(self):
+        self.ai.ponder(self.snapshot, self._stop)
+
+    def stop(self):
+        """Stop pondering and block until the thread has exited."""
+        self._stop.set()
+        self.wait()
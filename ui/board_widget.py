@@ -199,6 +199,9 @@ class BoardWidget(QWidget):
         self.update()
 
     def mousePressEvent(self, event):
+        # ignore clicks while the AI is thinking about its move
+        if getattr(self.game.players[self.game.current], 'is_ai', False):
+            return
         pos = event.position()
         cs = self.cell_size
         col = int(pos.x() // cs)
@@ -214,9 +217,8 @@ class BoardWidget(QWidget):
 
     def try_pawn_move(self, row, col):
         current = self.game.current
-        legal = self.game.legal_moves(current)
 
-        if (row, col) in legal:
+        if self.game.is_legal_pawn_move(row, col, current):
             try:
                 self.game.move_pawn(current, row, col)
                 self.moveMade.emit()
@@ -1,15 +1,55 @@
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QLineEdit, QHBoxLayout, QPushButton,
-     QFrame
+     QFrame, QApplication
 )
 from PyQt6.QtCore import Qt, QTimer
-from PyQt6.QtGui import QPixmap, QPalette, QBrush
+from PyQt6.QtGui import QPixmap, QPalette, QBrush, QShortcut, QKeySequence
 import os
+import sqlite3
+import threading
+from datetime import date
 
 from .board_widget import BoardWidget
+from .ai_worker import AIWorker, PonderWorker
 from utils import resource_path
 from game.game_state import GameState
+from game.record import GameIndex, GameRecord, RecordWriter
 from ai.ai import MinimaxAI
+from ai.mcts import MCTSAI
+from ai.book import default_book
+
+# difficulty name -> MinimaxAI settings
+# "Timed" deepens iteratively and answers within its time budget on any board size
+# Easy and Medium solve only wall-less endgames, without the few-walls proof search
+AI_DIFFICULTIES = {
+    "Easy": {"max_depth": 1, "endgame_proofs": False},
+    "Medium": {"max_depth": 2, "endgame_proofs": False},
+    "Hard": {"max_depth": 3},
+    "Timed": {"max_depth": 8, "time_limit_ms": 2000},
+}
+
+# difficulty name -> MCTSAI settings
+MCTS_DIFFICULTIES = {
+    "Easy": {"iterations": 300},
+    "Medium": {"iterations": 1500},
+    "Hard": {"iterations": 5000},
+    "Timed": {"iterations": None, "time_limit_ms": 2000},
+}
+AI_ENGINES = ("Minimax", "MCTS")
+
+# every finished or abandoned game is appended here (see game.record)
+GAME_ARCHIVE = os.path.join(os.path.expanduser("~"), ".quoridor", "games.qgr")
+_archive_lock = threading.Lock()  # one writer at a time
+
+
+def write_to_archive(record):
+    # runs off the GUI thread: indexing a long archive can take a while
+    with _archive_lock:
+        try:
+            with RecordWriter(GAME_ARCHIVE, GameIndex(GAME_ARCHIVE)) as writer:
+                writer.write(record)
+        except (OSError, ValueError, sqlite3.Error):
+            pass  # a read-only home, a locked index or a damaged archive must not interrupt the game
 
 class GameWindow(QWidget):
     def __init__(self,stacked_widget):
@@ -21,6 +61,13 @@ class GameWindow(QWidget):
         self.p1_name = "Player 1"
         self.p2_name = "Player 2"
         self.time_limit = 0
+        self.ai = None
+        self.ai_worker = None
+        self.ponder_worker = None
+        self.pondering = True  # let the AI think while the human is to move
+        self.difficulty = "Hard"
+        self.engine = "Minimax"
+        self.archived = False
         
         img = resource_path(os.path.join(os.path.dirname(__file__), "assets", "background.jpg"))
         pix = QPixmap(img).scaled(
@@ -42,6 +89,17 @@ class GameWindow(QWidget):
         main_layout.addLayout(self.center_panel)
         main_layout.addWidget(self.bottom_bar)
 
+        # F3 toggles the AI search statistics overlay
+        self.debug_overlay = QLabel(self)
+        self.debug_overlay.setObjectName("DebugOverlay")
+        self.debug_overlay.hide()
+        QShortcut(QKeySequence("F3"), self, activated=self.toggle_debug_overlay)
+
+        # a QThread still running when the app exits makes Qt abort
+        app = QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.cancel_ai_move)
+
     # -------------------------
     # Top Bar
     # -------------------------
@@ -170,6 +228,10 @@ class GameWindow(QWidget):
         palette.setBrush(QPalette.ColorRole.Window, QBrush(pix))
         self.setPalette(palette)
         super().resizeEvent(event)
+
+    def closeEvent(self, event):
+        self.cancel_ai_move()
+        super().closeEvent(event)
         
         
     def menu_handle(self):
@@ -180,16 +242,15 @@ class GameWindow(QWidget):
         self.reset_game()
         
     def reset_game(self):
+        # the search thread must be gone before this window is deleted
+        self.cancel_ai_move()
+        self.archive_game()
         index = self.stacked_widget.indexOf(self)
 
         # Preserve AI settings
         ai_enabled = self.ai is not None
-        difficulty = "Hard"  # Default to Hard if AI is enabled
-        if self.ai:
-            if self.ai.max_depth == 1:
-                difficulty = "Easy"
-            elif self.ai.max_depth == 2:
-                difficulty = "Medium"
+        difficulty = self.difficulty
+        engine = self.engine
 
         board_size = self.board.size
 
@@ -198,21 +259,24 @@ class GameWindow(QWidget):
 
         # Pass AI settings to the new GameWindow
         new_window = GameWindow(self.stacked_widget)
-        new_window.start_game(ai_enabled=ai_enabled, difficulty=difficulty, board_size=board_size)
+        new_window.start_game(ai_enabled=ai_enabled, difficulty=difficulty, board_size=board_size,
+                              engine=engine)
 
         self.stacked_widget.insertWidget(index, new_window)
         self.stacked_widget.setCurrentIndex(index)
 
-    def start_game(self, ai_enabled: bool, difficulty: str, board_size: int = 9):
-        depth = 3
-        if difficulty == "Easy":
-            depth = 1
-        elif difficulty == "Medium":
-            depth = 2
-        elif difficulty == "Hard":
-            depth = 3
-            
-        self.ai = MinimaxAI(max_depth=depth) if ai_enabled else None
+    def start_game(self, ai_enabled: bool, difficulty: str, board_size: int = 9,
+                   engine: str = "Minimax"):
+        # Unknown names fall back to Hard / Minimax
+        self.difficulty = difficulty if difficulty in AI_DIFFICULTIES else "Hard"
+        self.engine = engine if engine in AI_ENGINES else "Minimax"
+        self.ai = None
+        if ai_enabled and self.engine == "MCTS":
+            self.ai = MCTSAI(**MCTS_DIFFICULTIES[self.difficulty])
+        elif ai_enabled:
+            # Easy plays its own openings; the others use the shipped book for this size
+            book = default_book(board_size) if self.difficulty != "Easy" else None
+            self.ai = MinimaxAI(**AI_DIFFICULTIES[self.difficulty], book=book)
         
         # Create new game state
         self.game = GameState(size=board_size)
@@ -247,6 +311,9 @@ class GameWindow(QWidget):
         self.update_walls_labels()
         
         if self.game.winner is not None:
+            # the human's move ended the game: nothing left to ponder
+            self.stop_pondering()
+            self.archive_game()
             self.board.show_winner()
             
         # If AI is enabled and it is AI turn (player 1)
@@ -254,11 +321,58 @@ class GameWindow(QWidget):
             # Small delay to let UI refresh before AI thinks
             QTimer.singleShot(100, self.make_ai_move)
 
+    def archive_game(self):
+        if self.archived or not hasattr(self, 'game') or not self.game.moves():
+            return
+        self.archived = True
+        tags = {"Event": "game", "Date": date.today().isoformat()}
+        if self.ai:
+            tags["AI"] = f"{self.engine} {self.difficulty}"
+        # not a daemon thread: interpreter exit waits for the write to finish
+        threading.Thread(target=write_to_archive, args=(GameRecord.from_state(self.game, **tags),),
+                         name="archive").start()
+
     def make_ai_move(self):
         if self.game.winner is not None or self.game.current != 1:
             return
-
-        move = self.ai.choose_move(self.game, 1)
+        if self.ai_worker is not None:
+            return  # already thinking
+        # the human has moved: the ponder search hands over to the real one
+        self.stop_pondering()
+
+        self.ai_worker = AIWorker(self.ai, self.game, 1, self)
+        self.ai_worker.moveReady.connect(self.apply_ai_move)
+        self.ai_worker.finished.connect(self.ai_worker.deleteLater)
+        self.ai_worker.start()
+
+    def cancel_ai_move(self):
+        self.stop_pondering()
+        if self.ai_worker is not None:
+            self.ai_worker.cancel()
+            self.ai_worker = None
+
+    def start_pondering(self):
+        if not self.pondering or self.ponder_worker is not None:
+            return
+        if self.game.winner is not None or self.game.current == 1:
+            return
+        self.ponder_worker = PonderWorker(self.ai, self.game, self)
+        self.ponder_worker.finished.connect(self.ponder_worker.deleteLater)
+        self.ponder_worker.start()
+
+    def stop_pondering(self):
+        if self.ponder_worker is not None:
+            self.ponder_worker.stop()
+            self.ponder_worker = None
+
+    def apply_ai_move(self, move):
+        if self.ai_worker is not None:
+            # moveReady is the last thing run() does: let the thread return
+            # before dropping it, as cancel() and stop() do
+            self.ai_worker.wait()
+            self.ai_worker = None
+        if self.game.winner is not None or self.game.current != 1:
+            return
         if move:
             if move[0] == 'M':
                 # ('M', r, c)
@@ -268,6 +382,55 @@ class GameWindow(QWidget):
                 self.game.try_place_wall(1, move[1], move[2], move[3])
         
         self.board.update()
+        self.update_debug_overlay()
+        self.start_pondering()
+
+    # -------------------------
+    # Debug overlay
+    # -------------------------
+    def toggle_debug_overlay(self):
+        # MCTSAI keeps its few counters always; only MinimaxAI has stats to switch
+        minimax = isinstance(self.ai, MinimaxAI)
+        if self.debug_overlay.isVisible():
+            self.debug_overlay.hide()
+            if minimax:
+                self.ai.disable_stats()
+            return
+        if minimax:
+            # stats are only collected while the overlay is open
+            self.ai.enable_stats()
+        self.debug_overlay.show()
+        self.debug_overlay.raise_()
+        self.update_debug_overlay()
+
+    def update_debug_overlay(self):
+        if not self.debug_overlay.isVisible():
+            return
+        if not self.ai:
+            lines = ["No AI in this game"]
+        elif isinstance(self.ai, MCTSAI):
+            if self.ai.last_iterations == 0:
+                lines = ["Waiting for the next AI search..."]
+            else:
+                lines = self.ai.summary()
+                lines.append("PV " + " ".join(self.format_action(a) for a in self.ai.last_pv))
+        elif self.ai.stats is None or self.ai.stats.depth == 0:
+            lines = ["Waiting for the next AI search..."]
+        else:
+            tt = self.ai.tt_stats()
+            lines = self.ai.stats.summary()
+            lines.append(f"TT hits {tt['hits']:,}  misses {tt['misses']:,}  ({tt['hit_rate']:.0%})")
+            lines.append(f"ponder hits {self.ai.ponder_hits}")
+            lines.append(f"score {self.ai.last_score:+}  PV " + " ".join(self.format_action(a) for a in self.ai.last_pv))
+        self.debug_overlay.setText("\n".join(lines))
+        self.debug_overlay.adjustSize()
+        self.debug_overlay.move(12, 60)
+
+    @staticmethod
+    def format_action(action) -> str:
+        if action[0] == 'M':
+            return f"{action[1]},{action[2]}"
+        return f"{action[1]}{action[2]},{action[3]}"
 
     def update_walls_labels(self):
         if hasattr(self, 'game') and self.game:
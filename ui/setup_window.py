@@ -104,7 +104,7 @@ class SetupWindow(QWidget):
         self.difficulty_label.hide()
 
         self.difficulty_combo = QComboBox()
-        self.difficulty_combo.addItems(["Easy", "Medium", "Hard"])
+        self.difficulty_combo.addItems(["Easy", "Medium", "Hard", "Timed"])
         self.difficulty_combo.setObjectName("aiDifficulty")
         self.difficulty_combo.hide()
 
@@ -115,6 +115,23 @@ class SetupWindow(QWidget):
 
         self.difficulty_row = difficulty_row
 
+        # ---- Engine Selection ----
+        engine_row = QHBoxLayout()
+
+        self.engine_label = QLabel("AI Engine:")
+        self.engine_label.setObjectName("setupFieldLabel")
+        self.engine_label.hide()
+
+        self.engine_combo = QComboBox()
+        self.engine_combo.addItems(["Minimax", "MCTS"])
+        self.engine_combo.setObjectName("aiDifficulty")
+        self.engine_combo.hide()
+
+        engine_row.addWidget(self.engine_label)
+        engine_row.addWidget(self.engine_combo)
+
+        scroll_layout.addLayout(engine_row)
+
         # ---- Time Limit ----
         t_label = QLabel("Time Limit (minutes, 0 for no limit)")
         t_label.setObjectName("setupFieldLabel")
@@ -209,6 +226,7 @@ class SetupWindow(QWidget):
     def handle_start(self):
         ai_enabled = self.ai_toggle.isChecked()
         difficulty_str = self.difficulty_combo.currentText()
+        engine_str = self.engine_combo.currentText()
         
         game_window = self.stacked_widget.widget(GAME_WINDOW)
         
@@ -227,7 +245,7 @@ class SetupWindow(QWidget):
             game_window.time_limit = 0
 
         if hasattr(game_window, 'start_game'):
-            game_window.start_game(ai_enabled, difficulty_str, board_size)
+            game_window.start_game(ai_enabled, difficulty_str, board_size, engine_str)
         
         self.stacked_widget.setCurrentIndex(GAME_WINDOW)
 
@@ -238,6 +256,8 @@ class SetupWindow(QWidget):
 
             self.difficulty_label.show()
             self.difficulty_combo.show()
+            self.engine_label.show()
+            self.engine_combo.show()
 
         else:
             self.p2.setDisabled(False)
@@ -245,3 +265,5 @@ class SetupWindow(QWidget):
 
             self.difficulty_label.hide()
             self.difficulty_combo.hide()
+            self.engine_label.hide()
+            self.engine_combo.hide()